@@ -0,0 +1,29 @@
+"""Compare vectorized ilr transformation against the row-wise loop."""
+
+from __future__ import print_function
+import timeit
+import numpy as np
+from scipy.linalg import helmert
+import compoda.core as coda
+
+
+def ilr_rowwise(data):
+    """Row-by-row ilr transformation (previous implementation)."""
+    dims = data.shape
+    out = np.zeros((dims[0], dims[1]-1))
+    helmertian = helmert(dims[1]).T
+    for i in range(data.shape[0]):
+        out[i, :] = np.dot(np.log(data[i, :]), helmertian)
+    return out
+
+
+for n_samples in [10**3, 10**4, 10**5]:
+    for n_parts in [3, 10]:
+        data = coda.closure(np.random.random([n_samples, n_parts]) + 0.01)
+        t_loop = min(timeit.repeat(lambda: ilr_rowwise(data),
+                                   number=1, repeat=3))
+        t_vect = min(timeit.repeat(lambda: coda.ilr_transformation(data),
+                                   number=1, repeat=3))
+        print('N={:>7d} D={:>2d}  loop: {:8.4f}s  vectorized: {:8.4f}s  '
+              'speedup: {:7.1f}x'.format(n_samples, n_parts, t_loop, t_vect,
+                                         t_loop / t_vect))
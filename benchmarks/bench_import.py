@@ -0,0 +1,18 @@
+"""Measure import time of compoda in fresh interpreter processes."""
+
+from __future__ import print_function
+import subprocess
+import sys
+
+N_REPEATS = 10
+SCRIPT = ("import time; start = time.perf_counter(); import {}; "
+          "print(time.perf_counter() - start)")
+
+for module in ['numpy', 'compoda', 'compoda.core']:
+    times = []
+    for _ in range(N_REPEATS):
+        output = subprocess.check_output(
+            [sys.executable, '-c', SCRIPT.format(module)])
+        times.append(float(output))
+    print('import {:<14s} best: {:6.1f} ms  median: {:6.1f} ms'.format(
+        module, 1000 * min(times), 1000 * sorted(times)[N_REPEATS // 2]))
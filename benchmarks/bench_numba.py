@@ -0,0 +1,23 @@
+"""Compare NumPy and Numba backends of the fused kernels."""
+
+from __future__ import print_function
+import timeit
+import numpy as np
+import compoda.core as coda
+
+N_SAMPLES, N_PARTS = 10**6, 10
+x = coda.closure(np.random.random([N_SAMPLES, N_PARTS]) + 0.01)
+y = coda.closure(np.random.random([N_SAMPLES, N_PARTS]) + 0.01)
+
+runs = [('closure', lambda b: coda.closure(x, backend=b)),
+        ('clr_transformation', lambda b: coda.clr_transformation(x,
+                                                                 backend=b)),
+        ('aitchison_dist', lambda b: coda.aitchison_dist(x, y, backend=b))]
+
+print('N={} D={}'.format(N_SAMPLES, N_PARTS))
+for name, func in runs:
+    func('numba')  # compile
+    t_np = min(timeit.repeat(lambda: func('numpy'), number=1, repeat=3))
+    t_nb = min(timeit.repeat(lambda: func('numba'), number=1, repeat=3))
+    print('{:<20s} numpy: {:7.4f}s  numba: {:7.4f}s  speedup: {:5.1f}x'.format(
+        name, t_np, t_nb, t_np / t_nb))
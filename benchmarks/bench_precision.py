@@ -0,0 +1,23 @@
+"""Compare float32 and float64 runtimes of core functions."""
+
+from __future__ import print_function
+import timeit
+import numpy as np
+import compoda.core as coda
+
+N_SAMPLES, N_PARTS = 10**6, 3
+data_64 = coda.closure(np.random.random([N_SAMPLES, N_PARTS]) + 0.01)
+data_32 = data_64.astype(np.float32)
+
+functions = [coda.closure, coda.clr_transformation, coda.ilr_transformation,
+             coda.aitchison_norm, coda.sample_center,
+             coda.sample_total_variance]
+
+print('N={} D={}'.format(N_SAMPLES, N_PARTS))
+for func in functions:
+    t_64 = min(timeit.repeat(lambda: func(data_64), number=1, repeat=3))
+    t_32 = min(timeit.repeat(lambda: func(data_32), number=1, repeat=3))
+    err = np.max(np.abs(func(data_32) - func(data_64)))
+    print('{:<24s} float64: {:7.4f}s  float32: {:7.4f}s  speedup: {:4.1f}x  '
+          'max abs err: {:.2e}'.format(func.__name__, t_64, t_32, t_64 / t_32,
+                                        err))
@@ -0,0 +1,50 @@
+"""Compare truncate_range and scale_range against the previous versions."""
+
+from __future__ import print_function
+import timeit
+import numpy as np
+from compoda.utils import truncate_range, scale_range
+
+
+def truncate_range_old(data, percMin=0.25, percMax=99.75, discard_zeros=True):
+    """Previous implementation based on fancy indexing."""
+    if discard_zeros:
+        msk = ~np.isclose(data, 0)
+        pMin, pMax = np.nanpercentile(data[msk], [percMin, percMax])
+    else:
+        pMin, pMax = np.nanpercentile(data, [percMin, percMax])
+    temp = data[~np.isnan(data)]
+    temp[temp < pMin], temp[temp > pMax] = pMin, pMax
+    data[~np.isnan(data)] = temp
+    if discard_zeros:
+        data[~msk] = 0
+    return data
+
+
+def scale_range_old(data, scale_factor=500, delta=0, discard_zeros=True):
+    """Previous implementation based on fancy indexing."""
+    if discard_zeros:
+        msk = ~np.isclose(data, 0)
+    else:
+        msk = np.ones(data.shape, dtype=bool)
+    scale_factor = scale_factor - delta
+    data[msk] = data[msk] - np.nanmin(data[msk])
+    data[msk] = scale_factor / np.nanmax(data[msk]) * data[msk]
+    if discard_zeros:
+        data[~msk] = 0
+    return data
+
+
+N_VOXELS = 10**7
+data = np.random.random(N_VOXELS)
+data[np.random.choice(N_VOXELS, N_VOXELS // 3, replace=False)] = 0
+
+runs = [('truncate_range (old)', lambda d: truncate_range_old(d)),
+        ('truncate_range', lambda d: truncate_range(d)),
+        ('truncate_range (hist)', lambda d: truncate_range(d, approx_tol=1e-4)),
+        ('scale_range (old)', lambda d: scale_range_old(d)),
+        ('scale_range', lambda d: scale_range(d))]
+print('N={}'.format(N_VOXELS))
+for name, func in runs:
+    t = min(timeit.repeat(lambda: func(np.copy(data)), number=1, repeat=3))
+    print('{:<24s} {:7.3f}s'.format(name, t))
@@ -0,0 +1,146 @@
+"""Benchmark suite for compoda.core and compoda.utils.
+
+Every public function is timed and its peak memory is recorded (with
+tracemalloc) over a sweep of sample counts and number of parts.
+
+Usage examples:
+    python run_benchmarks.py                          # print a table
+    python run_benchmarks.py --save baseline.json     # store results
+    python run_benchmarks.py --compare baseline.json  # compare to stored
+    python run_benchmarks.py --samples 1e3 1e8 --parts 3 50 --max-gb 64
+
+"""
+
+from __future__ import print_function
+import argparse
+import json
+import timeit
+import tracemalloc
+import numpy as np
+import compoda.core as coda
+from compoda.utils import truncate_range, scale_range
+
+
+def _comp(n, d):
+    """Random closed compositions."""
+    return coda.closure(np.random.random([n, d]) + 0.01)
+
+
+# name: (function, setup returning the positional arguments)
+BENCHMARKS = {
+    'closure': (coda.closure, lambda n, d: (np.random.random([n, d]),)),
+    'perturb': (coda.perturb, lambda n, d: (_comp(n, d), _comp(1, d))),
+    'power': (coda.power, lambda n, d: (_comp(n, d), 0.5)),
+    'aitchison_inner_product': (coda.aitchison_inner_product,
+                                lambda n, d: (_comp(n, d), _comp(n, d))),
+    'aitchison_norm': (coda.aitchison_norm, lambda n, d: (_comp(n, d),)),
+    'aitchison_dist': (coda.aitchison_dist,
+                       lambda n, d: (_comp(n, d), _comp(n, d))),
+    'geometric_mean': (coda.geometric_mean, lambda n, d: (_comp(n, d),)),
+    'alr_transformation': (coda.alr_transformation,
+                           lambda n, d: (_comp(n, d),)),
+    'inverse_alr_transformation': (
+        coda.inverse_alr_transformation,
+        lambda n, d: (coda.alr_transformation(_comp(n, d)),)),
+    'clr_transformation': (coda.clr_transformation,
+                           lambda n, d: (_comp(n, d),)),
+    'inverse_clr_transformation': (
+        coda.inverse_clr_transformation,
+        lambda n, d: (coda.clr_transformation(_comp(n, d)),)),
+    'ilr_transformation': (coda.ilr_transformation,
+                           lambda n, d: (_comp(n, d),)),
+    'inverse_ilr_transformation': (
+        coda.inverse_ilr_transformation,
+        lambda n, d: (coda.ilr_transformation(_comp(n, d)),)),
+    'sample_center': (coda.sample_center, lambda n, d: (_comp(n, d),)),
+    'sample_total_variance': (coda.sample_total_variance,
+                              lambda n, d: (_comp(n, d),)),
+    'sample_sstd': (coda.sample_sstd, lambda n, d: (_comp(n, d),)),
+    'variation_matrix': (coda.variation_matrix, lambda n, d: (_comp(n, d),)),
+    # basis only depends on D, cache is cleared to time the construction
+    'helmert_basis': (lambda d: (coda._HELMERT_BASES.clear(),
+                                 coda.helmert_basis(d))[1],
+                      lambda n, d: (d,)),
+    # utils work on images, use n * d voxels
+    'truncate_range': (truncate_range,
+                       lambda n, d: (np.random.random(n * d),)),
+    'scale_range': (scale_range, lambda n, d: (np.random.random(n * d),)),
+}
+
+# Functions that modify their input get fresh copies for every repeat
+IN_PLACE = {'truncate_range', 'scale_range'}
+
+
+def run(name, n_samples, n_parts, repeat):
+    """Time one benchmark and measure its peak memory."""
+    func, setup = BENCHMARKS[name]
+    args = setup(n_samples, n_parts)
+    times = []
+    for _ in range(repeat):
+        call_args = [np.copy(a) for a in args] if name in IN_PLACE else args
+        times.append(timeit.timeit(lambda: func(*call_args), number=1))
+    call_args = [np.copy(a) for a in args] if name in IN_PLACE else args
+    tracemalloc.start()
+    func(*call_args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'time': min(times), 'peak_mb': peak / 2.**20}
+
+
+def main():
+    """Run the sweep, print a table, optionally save or compare."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--samples', type=float, nargs=2, default=[1e3, 1e6],
+                        metavar=('MIN', 'MAX'),
+                        help='Range of sample counts (powers of ten).')
+    parser.add_argument('--parts', type=int, nargs='+', default=[3, 10, 50],
+                        help='Numbers of parts (D).')
+    parser.add_argument('--functions', nargs='+', default=sorted(BENCHMARKS),
+                        choices=sorted(BENCHMARKS), metavar='NAME',
+                        help='Subset of functions to benchmark.')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-gb', type=float, default=4.,
+                        help='Skip cases whose input exceeds this size.')
+    parser.add_argument('--save', help='Write results to this JSON file.')
+    parser.add_argument('--compare', help='Baseline JSON file to compare.')
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    exponents = range(int(np.log10(args.samples[0])),
+                      int(np.log10(args.samples[1])) + 1)
+    header = '{:<28s} {:>10s} {:>4s} {:>10s} {:>10s}'.format(
+        'function', 'N', 'D', 'time [s]', 'peak [MB]')
+    if baseline:
+        header += ' {:>10s} {:>8s}'.format('base [s]', 'speedup')
+    print(header)
+    print('-' * len(header))
+
+    results = {}
+    for name in args.functions:
+        for n_parts in args.parts:
+            for exp in exponents:
+                n_samples = 10**exp
+                if n_samples * n_parts * 8 > args.max_gb * 2**30:
+                    continue
+                key = '{}|{}|{}'.format(name, n_samples, n_parts)
+                res = run(name, n_samples, n_parts, args.repeat)
+                results[key] = res
+                line = '{:<28s} {:>10d} {:>4d} {:>10.4f} {:>10.1f}'.format(
+                    name, n_samples, n_parts, res['time'], res['peak_mb'])
+                if key in baseline:
+                    base = baseline[key]['time']
+                    line += ' {:>10.4f} {:>7.2f}x'.format(base,
+                                                          base / res['time'])
+                print(line)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,8 @@
-"""For having the version."""	
-	
-import pkg_resources	
-	
-__version__ = pkg_resources.require("compoda")[0].version
+"""For having the version."""
+
+try:
+    from importlib.metadata import version as _version
+except ImportError:  # Python < 3.8
+    from importlib_metadata import version as _version
+
+__version__ = _version('compoda')
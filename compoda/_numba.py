@@ -0,0 +1,56 @@
+"""Fused Numba kernels used by the 'numba' backend (see compoda.backend).
+
+Numba is imported here only, so that it is loaded the first time a kernel is
+requested. Kernels expect 2d arrays and preallocated outputs.
+
+"""
+
+from __future__ import division
+import numpy as np
+from numba import njit, prange
+
+
+@njit(parallel=True)
+def closure(data, k, out):
+    """Sample-wise closure in one pass."""
+    n_samples, n_parts = data.shape
+    for i in prange(n_samples):
+        total = 0.
+        for j in range(n_parts):
+            total += data[i, j]
+        total = total / k
+        for j in range(n_parts):
+            out[i, j] = data[i, j] / total
+    return out
+
+
+@njit(parallel=True)
+def clr_transformation(data, out):
+    """Centered logratio transformation in one pass."""
+    n_samples, n_parts = data.shape
+    for i in prange(n_samples):
+        mean = 0.
+        for j in range(n_parts):
+            out[i, j] = np.log(data[i, j])
+            mean += out[i, j]
+        mean = mean / n_parts
+        for j in range(n_parts):
+            out[i, j] -= mean
+    return out
+
+
+@njit(parallel=True)
+def aitchison_dist(x, y, out):
+    """Aitchison distance from clr differences without temporaries."""
+    n_samples, n_parts = x.shape
+    for i in prange(n_samples):
+        mean = 0.
+        for j in range(n_parts):
+            mean += np.log(x[i, j] / y[i, j])
+        mean = mean / n_parts
+        total = 0.
+        for j in range(n_parts):
+            diff = np.log(x[i, j] / y[i, j]) - mean
+            total += diff * diff
+        out[i] = np.sqrt(total)
+    return out
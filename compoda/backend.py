@@ -0,0 +1,57 @@
+"""Selection of the computational backend of compoda.core.
+
+Functions with a backend argument (closure, clr_transformation and
+aitchison_dist) can run on fused, multi-threaded Numba kernels, which make a
+single pass over memory per sample instead of several NumPy passes. Numba is
+optional; when it is not installed the NumPy implementation is used.
+
+"""
+
+import importlib.util
+import warnings
+
+BACKENDS = ('numpy', 'numba')
+
+# Only checks for the package, Numba itself is slow to import
+HAVE_NUMBA = importlib.util.find_spec('numba') is not None
+
+_BACKEND = 'numpy'
+
+
+def set_backend(backend):
+    """Set the default backend.
+
+    Parameters
+    ----------
+    backend : str, 'numpy' or 'numba'
+        Backend used when functions are called without a backend argument.
+
+    """
+    global _BACKEND
+    if backend not in BACKENDS:
+        raise ValueError('backend must be one of ' + str(BACKENDS))
+    _BACKEND = backend
+
+
+def get_backend(backend=None):
+    """Resolve the backend to be used.
+
+    Parameters
+    ----------
+    backend : str or None
+        Requested backend, None for the default set with set_backend.
+
+    Returns
+    -------
+    backend : str
+        'numba' if requested and available, 'numpy' otherwise.
+
+    """
+    if backend is None:
+        backend = _BACKEND
+    if backend not in BACKENDS:
+        raise ValueError('backend must be one of ' + str(BACKENDS))
+    if backend == 'numba' and not HAVE_NUMBA:
+        warnings.warn('Numba is not installed, falling back to NumPy.')
+        return 'numpy'
+    return backend
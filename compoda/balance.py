@@ -0,0 +1,220 @@
+"""Color balance of multi-channel images in the simplex.
+
+Compositions are centered and standardized, extreme compositions are
+truncated to a maximum Aitchison norm and the result is scaled by the
+(truncated) lightness of every voxel. In clr coordinates centering,
+standardization and truncation are one affine map followed by a row-wise
+scaling, so each chunk needs a single logarithm and a single exponential.
+
+"""
+
+from __future__ import division
+import numpy as np
+from compoda.core import (closure, clr_transformation,
+                          inverse_clr_transformation)
+from compoda.streaming import (StreamingStatistics, iter_chunks,
+                               DEFAULT_CHUNK_SIZE)
+from compoda.utils import _percentiles_from_histogram
+
+
+def lightness(data):
+    """Lightness, the mean of the maximum and minimum measurement.
+
+    Parameters
+    ----------
+    data : 2d numpy array, shape [n_samples, n_measurements]
+
+    Returns
+    -------
+    light : 1d numpy array, shape [n_samples]
+
+    """
+    light = np.max(data, axis=1)
+    light += np.min(data, axis=1)
+    light /= 2.
+    return light
+
+
+class ColorBalance(object):
+    """Simplex color balance, fitted once and applied chunk by chunk.
+
+    Parameters
+    ----------
+    anorm_thr : float
+        Balanced compositions with a larger Aitchison norm are powered down
+        to this norm.
+    perc_min : float
+        Lower percentile of the lightness truncation.
+    perc_max : float
+        Upper percentile of the lightness truncation.
+    approx_tol : float
+        Lightness percentiles are estimated from a histogram, with an error
+        of at most approx_tol times the lightness range (see
+        compoda.utils.truncate_range).
+    chunk_size : int, positive
+        Number of rows processed at once.
+
+    Attributes
+    ----------
+    center_ : 2d numpy array, shape [1, n_measurements]
+        Sample center of the masked samples.
+    totvar_ : float
+        Sample total variance of the masked samples.
+    light_min_ : float
+        Lower bound of the lightness.
+    light_max_ : float
+        Upper bound of the lightness.
+    n_samples_seen_ : int
+        Number of samples used for the statistics.
+
+    """
+
+    _params = ['anorm_thr', 'perc_min', 'perc_max', 'approx_tol']
+    _fitted = ['center_', 'totvar_', 'light_min_', 'light_max_',
+               'n_samples_seen_']
+
+    def __init__(self, anorm_thr=3., perc_min=1., perc_max=99.,
+                 approx_tol=1e-4, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.anorm_thr = anorm_thr
+        self.perc_min = perc_min
+        self.perc_max = perc_max
+        self.approx_tol = approx_tol
+        self.chunk_size = chunk_size
+
+    def fit(self, data, mask=None):
+        """Compute center, total variance and lightness bounds.
+
+        The first pass accumulates the statistics and the lightness range,
+        the second pass a lightness histogram for the percentiles. Memory is
+        bounded by chunk_size.
+
+        Parameters
+        ----------
+        data : 2d array-like, shape [n_samples, n_measurements]
+            Positive measurements (zeros imputed), e.g. a np.memmap.
+        mask : 1d numpy array of bool, shape [n_samples], optional
+            Samples used for the statistics. All samples when None.
+
+        Returns
+        -------
+        self : ColorBalance
+
+        """
+        def _chunks():
+            for chunk in iter_chunks(data.shape[0], self.chunk_size):
+                temp = np.asarray(data[chunk], dtype=float)
+                if mask is not None:
+                    temp = temp[mask[chunk]]
+                if temp.shape[0] > 0:
+                    yield temp
+
+        stats = StreamingStatistics()
+        l_min, l_max = np.inf, -np.inf
+        for temp in _chunks():
+            stats.update(temp)
+            light = lightness(temp)
+            l_min = min(l_min, np.min(light))
+            l_max = max(l_max, np.max(light))
+        if stats.n_samples == 0:
+            raise ValueError('No samples to fit, the mask is empty.')
+
+        n_bins = max(int(np.ceil(1. / self.approx_tol)), 1)
+        counts = np.zeros(n_bins, dtype=np.int64)
+        for temp in _chunks():
+            counts += np.histogram(lightness(temp), bins=n_bins,
+                                   range=(l_min, l_max))[0]
+        edges = np.histogram_bin_edges([], bins=n_bins, range=(l_min, l_max))
+        self.light_min_, self.light_max_ = _percentiles_from_histogram(
+            counts, edges, [self.perc_min, self.perc_max])
+        self.center_ = stats.center
+        self.totvar_ = stats.total_variance
+        self.n_samples_seen_ = stats.n_samples
+        self._compile()
+        return self
+
+    def _compile(self):
+        self._clr_center = clr_transformation(self.center_)[0]
+        self._factor = np.power(self.totvar_, -1./2.)
+
+    def _balance_chunk(self, data):
+        """Balanced compositions of a chunk of samples."""
+        clr = clr_transformation(data)
+        clr -= self._clr_center
+        clr *= self._factor
+        anorm = np.sqrt(np.einsum('ij,ij->i', clr, clr))
+        trunc = anorm > self.anorm_thr
+        clr[trunc] *= (self.anorm_thr / anorm[trunc])[:, None]
+        return inverse_clr_transformation(clr)
+
+    def transform(self, data, mask=None, out=None):
+        """Balance compositions and scale them by the truncated lightness.
+
+        Parameters
+        ----------
+        data : 2d array-like, shape [n_samples, n_measurements]
+            Positive measurements (zeros imputed), e.g. a np.memmap.
+        mask : 1d numpy array of bool, shape [n_samples], optional
+            Samples to be balanced. Samples outside of the mask are only
+            closed. All samples when None.
+        out : 2d array-like, shape [n_samples, n_measurements], optional
+            Preallocated output (e.g. np.memmap).
+
+        Returns
+        -------
+        out : 2d array-like, shape [n_samples, n_measurements]
+            Balanced compositions scaled by lightness.
+
+        """
+        if not hasattr(self, 'center_'):
+            raise ValueError('ColorBalance is not fitted yet.')
+        if out is None:
+            out = np.zeros(data.shape)
+        for chunk in iter_chunks(data.shape[0], self.chunk_size):
+            temp = np.asarray(data[chunk], dtype=float)
+            light = np.clip(lightness(temp), self.light_min_, self.light_max_)
+            if mask is None:
+                comp = self._balance_chunk(temp)
+            else:
+                comp = closure(temp)
+                inside = mask[chunk]
+                comp[inside] = self._balance_chunk(temp[inside])
+            comp *= light[:, None]
+            out[chunk] = comp
+        return out
+
+    def fit_transform(self, data, mask=None, out=None):
+        """Fit to data, then transform it."""
+        return self.fit(data, mask).transform(data, mask, out=out)
+
+    def save(self, filename):
+        """Store parameters and fitted statistics in a .npz file."""
+        if not hasattr(self, 'center_'):
+            raise ValueError('ColorBalance is not fitted yet.')
+        np.savez(filename, **{name: getattr(self, name)
+                              for name in self._params + self._fitted})
+
+    @classmethod
+    def load(cls, filename, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Restore a fitted ColorBalance from a .npz file.
+
+        Parameters
+        ----------
+        filename : str
+            File written by save.
+        chunk_size : int, positive
+            Number of rows processed at once.
+
+        Returns
+        -------
+        balance : ColorBalance
+
+        """
+        with np.load(filename) as archive:
+            params = {name: archive[name].item() for name in cls._params}
+            balance = cls(chunk_size=chunk_size, **params)
+            for name in cls._fitted:
+                value = archive[name]
+                setattr(balance, name, value.item() if value.ndim == 0
+                        else value)
+        balance._compile()
+        return balance
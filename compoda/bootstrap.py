@@ -0,0 +1,115 @@
+"""Bootstrap confidence intervals of the sample center and total variance.
+
+Clr coordinates and their squared norms are computed once. A bootstrap
+resample is described by multinomial weights w (the number of times each
+sample is drawn), so its clr mean and total variance are
+
+    clr_mean = w @ clr / n,    tot_var = w @ |clr|**2 / n - |clr_mean|**2
+
+and a batch of replicates is a single matrix product. Batches run on the
+thread pool of compoda.parallel. Every replicate has its own random
+generator spawned from the seed, so the resamples do not depend on the
+batch size or the number of workers. Results agree up to rounding (the
+order of the BLAS reductions changes with the batch size). Requires
+NumPy >= 1.17 for SeedSequence and default_rng.
+
+"""
+
+from __future__ import division
+import numpy as np
+from compoda.core import clr_transformation, closure
+from compoda.parallel import for_each_chunk
+
+MAX_WEIGHTS = 2**23  # elements of one weight matrix (64 MB in float64)
+
+
+def bootstrap_replicates(data, n_boot=1000, seed=None, batch_size=None,
+                         n_workers=None):
+    """Sample center and total variance of bootstrap resamples.
+
+    Parameters
+    ----------
+    data : 2d numpy array, shape [n_samples, n_coordinates]
+        Compositions (closed or not) in simplex space.
+    n_boot : int, positive
+        Number of bootstrap replicates.
+    seed : int or numpy.random.SeedSequence, optional
+        Seed for reproducible replicates.
+    batch_size : int, optional
+        Number of replicates evaluated with one matrix product. Chosen such
+        that the weights take at most MAX_WEIGHTS elements if None.
+    n_workers : int, optional
+        Number of threads. See compoda.parallel.get_n_workers.
+
+    Returns
+    -------
+    centers : 2d numpy array, shape [n_boot, n_coordinates]
+        Sample center of every replicate.
+    tot_vars : 1d numpy array, shape [n_boot]
+        Sample total variance of every replicate.
+
+    """
+    n_samples, n_parts = data.shape
+    clr = clr_transformation(np.asarray(data, dtype=float))
+    shift = np.mean(clr, axis=0)  # limits cancellation in the variance
+    clr -= shift
+    sq_norm = np.einsum('ij,ij->i', clr, clr)
+
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    seeds = seed.spawn(n_boot)
+    if batch_size is None:
+        batch_size = max(1, min(n_boot, MAX_WEIGHTS // n_samples))
+
+    clr_means = np.empty((n_boot, n_parts))
+    tot_vars = np.empty(n_boot)
+
+    def _task(batch):
+        weights = np.empty((batch.stop - batch.start, n_samples))
+        for i, child in enumerate(seeds[batch]):
+            draws = np.random.default_rng(child).integers(0, n_samples,
+                                                          n_samples)
+            weights[i] = np.bincount(draws, minlength=n_samples)
+        weights /= n_samples
+        mean = np.dot(weights, clr)
+        clr_means[batch] = mean
+        tot_vars[batch] = np.dot(weights, sq_norm) - np.sum(mean**2, axis=1)
+
+    for_each_chunk(_task, n_boot, n_workers=n_workers, chunk_size=batch_size)
+    np.maximum(tot_vars, 0, out=tot_vars)
+    clr_means += shift
+    clr_means -= np.max(clr_means, axis=1, keepdims=True)
+    return closure(np.exp(clr_means)), tot_vars
+
+
+def bootstrap_confidence_intervals(data, n_boot=1000, confidence=0.95,
+                                   seed=None, batch_size=None,
+                                   n_workers=None):
+    """Percentile bootstrap intervals of sample center and total variance.
+
+    Parameters
+    ----------
+    data : 2d numpy array, shape [n_samples, n_coordinates]
+        Compositions (closed or not) in simplex space.
+    n_boot : int, positive
+        Number of bootstrap replicates.
+    confidence : float, range (0, 1)
+        Confidence level of the intervals.
+    seed, batch_size, n_workers
+        See bootstrap_replicates.
+
+    Returns
+    -------
+    center_ci : 2d numpy array, shape [2, n_coordinates]
+        Lower and upper bounds of every part of the sample center.
+    tot_var_ci : 1d numpy array, shape [2]
+        Lower and upper bound of the sample total variance.
+
+    """
+    if not 0 < confidence < 1:
+        raise ValueError('confidence must be in range (0, 1).')
+    centers, tot_vars = bootstrap_replicates(
+        data, n_boot, seed=seed, batch_size=batch_size, n_workers=n_workers)
+    q = [50. * (1 - confidence), 50. * (1 + confidence)]
+    return (np.percentile(centers, q, axis=0),
+            np.percentile(tot_vars, q))
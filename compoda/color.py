@@ -0,0 +1,134 @@
+"""Hue, saturation and intensity decompositions of multi-channel images."""
+
+from __future__ import division
+import numpy as np
+from compoda.core import clr_transformation, helmert_basis, _float_dtype
+from compoda.parallel import for_each_chunk
+from compoda.streaming import DEFAULT_CHUNK_SIZE
+
+# Rows: achromatic (intensity) axis and two orthonormal chromatic axes
+HSI_MATRIX = np.array([
+    [1./np.sqrt(3), 1./np.sqrt(3), 1./np.sqrt(3)],
+    [1./np.sqrt(6), 1./np.sqrt(6), -2./np.sqrt(6)],
+    [1./np.sqrt(2), -1./np.sqrt(2), 0.]])
+
+
+def rgb_to_hsi(rgb, chunk_size=DEFAULT_CHUNK_SIZE, n_workers=None):
+    """Red green blue (RGB) to hue saturation intensity (HSI).
+
+    Parameters
+    ----------
+    rgb : 2d numpy array, shape [n_samples, 3]
+        Three channel data, e.g. three MRI contrasts of every voxel.
+    chunk_size : int, positive
+        Number of rows processed at once.
+    n_workers : int, optional
+        Number of threads. See compoda.parallel.get_n_workers.
+
+    Returns
+    -------
+    intensity : 1d numpy array, shape [n_samples]
+        Projection on the achromatic axis.
+    hue : 1d numpy array, shape [n_samples]
+        Angle in the chromatic plane, in degrees [-180, 180].
+    saturation : 1d numpy array, shape [n_samples]
+        Distance from the achromatic axis.
+
+    """
+    n_samples = rgb.shape[0]
+    dtype = _float_dtype(rgb)
+    intensity = np.empty(n_samples, dtype=dtype)
+    hue = np.empty(n_samples, dtype=dtype)
+    saturation = np.empty(n_samples, dtype=dtype)
+    matrix = HSI_MATRIX.T.astype(dtype)
+
+    def _task(chunk):
+        temp = np.dot(rgb[chunk], matrix)
+        intensity[chunk] = temp[:, 0]
+        hue[chunk] = np.degrees(np.arctan2(temp[:, 2], temp[:, 1]))
+        saturation[chunk] = np.hypot(temp[:, 1], temp[:, 2])
+
+    for_each_chunk(_task, n_samples, n_workers=n_workers,
+                   chunk_size=chunk_size)
+    return intensity, hue, saturation
+
+
+def barycentric_decomposition(data, references=None, full_circle=False,
+                              chunk_size=DEFAULT_CHUNK_SIZE, n_workers=None):
+    """Intensity, Aitchison norm and Aitchison angular differences.
+
+    The compositional analogue of intensity, saturation and hue [1]. All
+    outputs are computed from one logarithm and one matrix product per chunk.
+
+    Parameters
+    ----------
+    data : 2d numpy array, shape [n_samples, n_coordinates]
+        Positive measurements (zeros imputed), closed or not.
+    references : 2d numpy array, shape [n_references, n_coordinates]
+        Reference compositions for the angular differences. Optional.
+    full_circle : bool
+        Only for three parts. Return signed angles in the ilr plane, in range
+        [0, 2*pi), instead of angles in range [0, pi]. Angles are measured
+        clockwise from the reference, as in the examples (2*pi minus the
+        half circle angle where the third part exceeds the first).
+    chunk_size : int, positive
+        Number of rows processed at once.
+    n_workers : int, optional
+        Number of threads. See compoda.parallel.get_n_workers.
+
+    Returns
+    -------
+    intensity : 1d numpy array, shape [n_samples]
+        Mean of the measurements.
+    anorm : 1d numpy array, shape [n_samples]
+        Aitchison norm (saturation).
+    angdif : 2d numpy array, shape [n_samples, n_references]
+        Aitchison angular difference (hue) in radians to every reference.
+        Zero for samples with zero norm. Only returned with references.
+
+    Reference
+    ---------
+    [1] Gulban, O. F., Goebel, R., Moerel, M., Zachlod, D., Mohlberg, H.,
+        Amunts, K., & de Martino, F. (2020). Improving a probabilistic
+        cytoarchitectonic atlas of auditory cortex using a novel method for
+        inter-individual alignment. eLife, 9. DOI: 10.7554/eLife.56963
+
+    """
+    n_samples, n_parts = data.shape
+    if full_circle and n_parts != 3:
+        raise ValueError('full_circle is only defined for three parts.')
+    dtype = _float_dtype(data)
+    intensity = np.empty(n_samples, dtype=dtype)
+    anorm = np.empty(n_samples, dtype=dtype)
+    if references is not None:
+        clr_ref = clr_transformation(np.atleast_2d(references)).astype(dtype)
+        ref_norm = np.sqrt(np.einsum('ij,ij->i', clr_ref, clr_ref))
+        if full_circle:
+            ilr_ref = np.dot(clr_ref, helmert_basis(3, dtype).T)
+            ref_angle = np.arctan2(ilr_ref[:, 1], ilr_ref[:, 0])
+        angdif = np.empty((n_samples, clr_ref.shape[0]), dtype=dtype)
+
+    def _task(chunk):
+        x = data[chunk]
+        intensity[chunk] = np.mean(x, axis=1)
+        clr = clr_transformation(x)
+        anorm[chunk] = np.sqrt(np.einsum('ij,ij->i', clr, clr))
+        if references is None:
+            return
+        if full_circle:
+            ilr = np.dot(clr, helmert_basis(3, dtype).T)
+            angle = ref_angle - np.arctan2(ilr[:, 1], ilr[:, 0])[:, None]
+            angdif[chunk] = np.mod(angle, 2 * np.pi)
+        else:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                cos = np.dot(clr, clr_ref.T)
+                cos /= anorm[chunk][:, None] * ref_norm
+            np.clip(cos, -1, 1, out=cos)
+            angdif[chunk] = np.arccos(cos)
+        angdif[chunk][anorm[chunk] == 0] = 0
+
+    for_each_chunk(_task, n_samples, n_workers=n_workers,
+                   chunk_size=chunk_size)
+    if references is None:
+        return intensity, anorm
+    return intensity, anorm, angdif
@@ -0,0 +1,154 @@
+"""Compositional data container with cached logratio representations."""
+
+from __future__ import division
+import numpy as np
+import compoda.core as coda
+
+
+def _readonly(arr):
+    """Mark an array as read-only and return it."""
+    arr.flags.writeable = False
+    return arr
+
+
+def _as_clr(other):
+    """Clr coordinates of a Composition or of an array of compositions."""
+    if isinstance(other, Composition):
+        return other.clr
+    return coda.clr_transformation(np.asarray(other))
+
+
+class Composition(object):
+    """Closed compositional data with lazily cached log, clr and ilr forms.
+
+    The data is closed once at construction. Log, clr and ilr coordinates are
+    computed the first time they are requested and reused by the metric and
+    statistic methods afterwards. Cached arrays are read-only; assigning new
+    values (through item assignment or the data attribute) recloses the data
+    and invalidates the cache.
+
+    Parameters
+    ----------
+    data : 2d numpy array, shape [n_samples, n_coordinates]
+        Compositions. Zeros should be imputed beforehand.
+    dtype : numpy dtype, optional
+        Floating point type, see compoda.core.closure.
+
+    """
+
+    def __init__(self, data, dtype=None):
+        self._cache = {}
+        self._data = _readonly(coda.closure(np.asarray(data), dtype=dtype))
+
+    @property
+    def data(self):
+        """Closed data, read-only 2d numpy array."""
+        return self._data
+
+    @data.setter
+    def data(self, values):
+        self._cache = {}
+        self._data = _readonly(coda.closure(np.asarray(values),
+                                            dtype=self._data.dtype))
+
+    def __setitem__(self, key, values):
+        data = np.array(self._data)
+        data[key] = values
+        self.data = data
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __len__(self):
+        return self._data.shape[0]
+
+    @property
+    def shape(self):
+        """Shape of the data, tuple."""
+        return self._data.shape
+
+    def _cached(self, name, func):
+        if name not in self._cache:
+            self._cache[name] = _readonly(func())
+        return self._cache[name]
+
+    @property
+    def log(self):
+        """Natural logarithm of the closed data (cached)."""
+        return self._cached('log', lambda: np.log(self._data))
+
+    @property
+    def clr(self):
+        """Centered logratio coordinates (cached)."""
+        def _clr():
+            out = np.array(self.log)
+            out -= np.mean(out, axis=-1, keepdims=True)
+            return out
+        return self._cached('clr', _clr)
+
+    @property
+    def ilr(self):
+        """Isometric logratio coordinates (cached)."""
+        def _ilr():
+            helmertian = coda.helmert_basis(self._data.shape[1],
+                                            self._data.dtype)
+            return np.matmul(self.log, helmertian.T)
+        return self._cached('ilr', _ilr)
+
+    def alr(self):
+        """Additive logratio coordinates, see core.alr_transformation."""
+        return self.log[:, :-1] - self.log[:, -1:]
+
+    def perturb(self, y):
+        """Perturbed compositions as a new Composition, see core.perturb."""
+        y = y.data if isinstance(y, Composition) else y
+        return Composition(coda.perturb(self._data, y, reclose=False))
+
+    def power(self, a):
+        """Powered compositions as a new Composition, see core.power."""
+        return Composition(coda.power(self._data, a, reclose=False))
+
+    def aitchison_norm(self):
+        """Aitchison norm of samples, see compoda.core.aitchison_norm."""
+        clr = self.clr
+        return np.sqrt(np.einsum('...i,...i->...', clr, clr))
+
+    def aitchison_inner_product(self, other):
+        """Aitchison inner product with other compositions (or a reference).
+
+        See compoda.core.aitchison_inner_product.
+        """
+        return np.einsum('...i,...i->...', self.clr, _as_clr(other))
+
+    def aitchison_dist(self, other):
+        """Aitchison distance to other compositions (or a reference).
+
+        See compoda.core.aitchison_dist.
+        """
+        diff = self.clr - _as_clr(other)
+        return np.sqrt(np.einsum('...i,...i->...', diff, diff))
+
+    def sample_center(self):
+        """Sample center, see compoda.core.sample_center."""
+        def _center():
+            clr_mean = np.mean(self.clr, axis=0)
+            return coda.closure(np.exp(clr_mean - np.max(clr_mean))[None, :])
+        return self._cached('center', _center)
+
+    def sample_total_variance(self, center=None):
+        """Sample total variance, see compoda.core.sample_total_variance."""
+        if center is None:
+            center = self.sample_center()
+        dist = self.aitchison_dist(np.asarray(center))
+        return self._data.dtype.type(np.mean(dist * dist, dtype=np.float64))
+
+    def variation_matrix(self):
+        """Variation matrix, see compoda.core.variation_matrix."""
+        clr = self.clr - np.mean(self.clr, axis=0)
+        cov = np.dot(clr.T, clr) / clr.shape[0]
+        return coda._covariance_to_variation(cov)
+
+    def sample_sstd(self):
+        """Simplicial standard deviation, see compoda.core.sample_sstd."""
+        totvar = self.sample_total_variance()
+        return np.sqrt(totvar / (self._data.shape[1] - 1))
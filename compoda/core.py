@@ -2,19 +2,48 @@
 
 from __future__ import division
 import numpy as np
-from scipy.linalg import helmert
+from compoda.backend import get_backend
 
+_HELMERT_BASES = {}
 
-def closure(data, k=1.0):
+
+def _float_dtype(data):
+    """Floating point type of the data, float64 for non-floating input."""
+    dtype = np.asarray(data).dtype
+    if np.issubdtype(dtype, np.floating):
+        return dtype
+    return np.dtype(np.float64)
+
+
+def _exp_closure(out):
+    """Exponentiate logarithms and close them in place (log-sum-exp).
+
+    The row maximum is subtracted first, so the largest part becomes 1 and
+    neither the exponentials nor their sum can overflow.
+
+    """
+    out -= np.max(out, axis=-1, keepdims=True)
+    np.exp(out, out=out)
+    return closure(out, out=out)
+
+
+def closure(data, k=1.0, out=None, dtype=None, backend=None):
     """Apply closure to data, sample-wise.
 
     Parameters
     ----------
     data : 2d numpy array, shape [n_samples, n_measurements]
         Data to be closed to a certain constant. Do not forget to deal with
-        zeros in the data before this operation.
+        zeros in the data before this operation (see compoda.impute).
     k : float, positive
         Sum of the measurements will be equal to this number.
+    out : 2d numpy array, shape [n_samples, n_measurements], optional
+        Array to store the result. Use out=data for in-place closure.
+    dtype : numpy dtype, optional
+        Floating point type of the output (e.g. np.float32). By default the
+        type of floating point input is preserved, other input gives float64.
+    backend : str, 'numpy' or 'numba', optional
+        Computational backend, see compoda.backend. Default backend if None.
 
     Returns
     -------
@@ -29,15 +58,23 @@ def closure(data, k=1.0):
         DOI: 10.1002/9781119003144
 
     """
-    data_sum = np.sum(data, axis=1)
-    out = np.copy(data)
-    for i in range(data.shape[1]):
-        out[:, i] = np.divide(out[:, i], data_sum)
-    out = out * k
-    return out
-
-
-def perturb(x, y, reclose=True):
+    if out is not None:
+        dtype = out.dtype
+    elif dtype is None:
+        dtype = _float_dtype(data)
+    dtype = np.dtype(dtype)  # also accept scalar types, e.g. np.float32
+    if get_backend(backend) == 'numba' and np.ndim(data) == 2:
+        from compoda import _numba
+        if out is None:
+            out = np.empty(data.shape, dtype=dtype)
+        return _numba.closure(data, dtype.type(k), out)
+    data_sum = np.sum(data, axis=-1, keepdims=True, dtype=dtype)
+    if k != 1:
+        data_sum = data_sum / dtype.type(k)
+    return np.divide(data, data_sum, out=out, dtype=dtype)
+
+
+def perturb(x, y, reclose=True, out=None):
     """Perturbation (analogous to addition in real space).
 
     Parameters
@@ -45,8 +82,12 @@ def perturb(x, y, reclose=True):
     x, y: 2d numpy array, shape [n_samples, n_measurements]
         Input x will be perturbed by y. Use y**-1 as the second input for
         perturbation difference (analogous to subtraction in real space).
+        A single composition of shape [1, n_measurements] or
+        [n_measurements] is broadcast to all samples.
     reclose: bool
         Apply closure to the compositions after perturbation. True by default.
+    out : 2d numpy array, shape [n_samples, n_measurements], optional
+        Array to store the result. Use out=x for in-place perturbation.
 
     Returns
     -------
@@ -61,21 +102,23 @@ def perturb(x, y, reclose=True):
         DOI: 10.1002/9781119003144
 
     """
-    out = x * y
-    return closure(out) if reclose else out
+    out = np.multiply(x, y, out=out)
+    return closure(out, out=out) if reclose else out
 
 
-def power(x, a, reclose=True):
+def power(x, a, reclose=True, out=None):
     """Powering transformation (analogous to multiplication in real space).
 
     Parameters
     ----------
     x : 2d numpy array, shape [n_samples, n_measurements]
         Input x will be powered by a.
-    a : float
-        Constant, real number.
+    a : float or 2d numpy array, shape [n_samples, 1]
+        Constant, real number. Can also be given per sample.
     reclose: bool
         Apply closure to the compositions after powering. True by default.
+    out : 2d numpy array, shape [n_samples, n_measurements], optional
+        Array to store the result. Use out=x for in-place powering.
 
     Returns
     -------
@@ -90,17 +133,22 @@ def power(x, a, reclose=True):
         DOI: 10.1002/9781119003144
 
     """
-    out = np.power(x, a)
-    return closure(out) if reclose else out
+    out = np.power(x, a, out=out)
+    return closure(out, out=out) if reclose else out
 
 
 def aitchison_inner_product(x, y):
     """Aitchison inner product of vectors in D dimensional simplex space [1].
 
+    Computed as the Euclidean inner product of clr coordinates, which equals
+    the pairwise log-ratio definition but needs only D logarithms per sample.
+
     Parameters
     ----------
     x, y : 2d numpy array, shape = [n_samples, n_measurements]
-        A vector in simplex space with barycentric coordinates.
+        A vector in simplex space with barycentric coordinates. A single
+        reference of shape [1, n_measurements] or [n_measurements] is
+        broadcast to all samples.
 
     Returns
     -------
@@ -115,18 +163,16 @@ def aitchison_inner_product(x, y):
         DOI: 10.1002/9781119003144
 
     """
-    dims = x.shape
-    temp = np.zeros(dims[0])
-    for i in range(dims[1]):
-        for j in range(dims[1]):
-            temp += np.log(x[:, i]/x[:, j]) * np.log(y[:, i]/y[:, j])
-    ip_xy = (1.0 / (2.0 * dims[1])) * temp
+    ip_xy = np.einsum('...i,...i->...', clr_transformation(x),
+                      clr_transformation(y))
     return ip_xy
 
 
 def aitchison_norm(x):
     """Aitchison norm of vectors in D dimensional simplex space [1].
 
+    Computed as the Euclidean norm of clr coordinates.
+
     Parameters
     ----------
     x : 2d numpy array, shape = [n_samples, n_measurements]
@@ -145,22 +191,24 @@ def aitchison_norm(x):
         DOI: 10.1002/9781119003144
 
     """
-    dims = x.shape
-    temp = np.zeros(dims[0])
-    for i in range(dims[1]):
-        for j in range(dims[1]):
-            temp = np.add(temp, np.log(x[:, i] / x[:, j])**2.)
-    x_a = np.sqrt(1.0/(2.0*dims[1])*temp)
+    clr = clr_transformation(x)
+    x_a = np.sqrt(np.einsum('...i,...i->...', clr, clr))
     return x_a
 
 
-def aitchison_dist(x, y):
+def aitchison_dist(x, y, backend=None):
     """Aitchison distance between vectors in D dimensional simplex space [1].
 
+    Computed as the Euclidean distance between clr coordinates.
+
     Parameters
     ----------
     x, y : 2d numpy array, shape = [n_samples, n_measurements]
-        Vectors in simplex space with barycentric coordinates.
+        Vectors in simplex space with barycentric coordinates. A single
+        reference of shape [1, n_measurements] or [n_measurements] is
+        broadcast to all samples.
+    backend : str, 'numpy' or 'numba', optional
+        Computational backend, see compoda.backend. Default backend if None.
 
     Returns
     -------
@@ -175,12 +223,17 @@ def aitchison_dist(x, y):
         DOI: 10.1002/9781119003144
 
     """
-    dims = x.shape
-    temp = np.zeros(dims[0])
-    for i in range(dims[1]):
-        for j in range(dims[1]):
-            temp += (np.log(x[:, i]/x[:, j]) - np.log(y[:, i]/y[:, j]))**2
-    d_xy = np.sqrt(1.0/(2.0*dims[1])*temp)
+    if (get_backend(backend) == 'numba' and np.ndim(x) == 2
+            and np.shape(x) == np.shape(y)):
+        from compoda import _numba
+        out = np.empty(x.shape[0], dtype=np.result_type(_float_dtype(x),
+                                                        _float_dtype(y)))
+        return _numba.aitchison_dist(x, y, out)
+    clr_x, clr_y = clr_transformation(x), clr_transformation(y)
+    if clr_x.shape != np.broadcast(clr_x, clr_y).shape:
+        clr_x, clr_y = clr_y, clr_x  # only the broadcast result is written
+    diff = np.subtract(clr_x, clr_y, out=clr_x)
+    d_xy = np.sqrt(np.einsum('...i,...i->...', diff, diff))
     return d_xy
 
 
@@ -198,11 +251,7 @@ def geometric_mean(data):
         Sample-wise geometric mean of the data.
 
     """
-    dims = data.shape
-    gmean = np.ones(dims[0])
-    for i in range(dims[1]):
-        gmean *= data[:, i]
-    return np.power(gmean, 1.0/dims[1])
+    return np.exp(np.mean(np.log(data), axis=1))
 
 
 def alr_transformation(data):
@@ -226,10 +275,7 @@ def alr_transformation(data):
         DOI: 10.1002/9781119003144
 
     """
-    dims = data.shape
-    out = np.zeros([dims[0], dims[1]-1])
-    for i in range(dims[1]-1):
-        out[:, i] = np.log(data[:, i]/data[:, -1])
+    out = np.log(data[..., :-1] / data[..., -1:])
     return out
 
 
@@ -255,18 +301,20 @@ def inverse_alr_transformation(data):
 
     """
     dims = data.shape
-    out = np.zeros([dims[0], dims[1]+1])
+    out = np.zeros([dims[0], dims[1]+1], dtype=_float_dtype(data))
     out[:, 0:dims[1]] = data
-    return closure(np.exp(out))
+    return _exp_closure(out)
 
 
-def clr_transformation(data):
+def clr_transformation(data, backend=None):
     """Centered logratio transformation.
 
     Parameters
     ----------
     data : 2d numpy array, shape [n_samples, n_coordinates]
         Barycentric coordinates (closed) in simplex space.
+    backend : str, 'numpy' or 'numba', optional
+        Computational backend, see compoda.backend. Default backend if None.
 
     Returns
     -------
@@ -281,11 +329,12 @@ def clr_transformation(data):
         DOI: 10.1002/9781119003144
 
     """
-    dims = data.shape
-    out = np.zeros([dims[0], dims[1]])
-    g = geometric_mean(data)
-    for i in range(dims[1]):
-        out[:, i] = np.log(data[:, i]/g)
+    if get_backend(backend) == 'numba' and np.ndim(data) == 2:
+        from compoda import _numba
+        out = np.empty(data.shape, dtype=_float_dtype(data))
+        return _numba.clr_transformation(data, out)
+    out = np.log(data)
+    out -= np.mean(out, axis=-1, keepdims=True)
     return out
 
 
@@ -310,17 +359,50 @@ def inverse_clr_transformation(data):
         DOI: 10.1002/9781119003144
 
     """
-    out = closure(np.exp(data))
-    return out
+    out = np.array(data, dtype=_float_dtype(data))
+    return _exp_closure(out)
+
+
+def helmert_basis(n_coordinates, dtype=np.float64):
+    """Orthonormal (Helmert) basis used in isometric logratio transformation.
+
+    Bases are computed once per dimension and type and cached afterwards.
+
+    Parameters
+    ----------
+    n_coordinates : int
+        Number of parts (D) of the compositions.
+    dtype : numpy dtype
+        Floating point type of the basis.
+
+    Returns
+    -------
+    basis : 2d numpy array, shape [n_coordinates-1, n_coordinates]
+        Read-only orthonormal basis (rows) of the clr hyperplane.
+
+    """
+    key = (n_coordinates, np.dtype(dtype))
+    basis = _HELMERT_BASES.get(key)
+    if basis is None:
+        from scipy.linalg import helmert  # deferred, slow to import
+        basis = helmert(n_coordinates).astype(dtype)
+        basis.flags.writeable = False
+        _HELMERT_BASES[key] = basis
+    return basis
 
 
-def ilr_transformation(data):
-    """Isometric logratio transformation (not vectorized).
+def ilr_transformation(data, out=None, basis=None):
+    """Isometric logratio transformation.
 
     Parameters
     ----------
     data : 2d numpy array, shape [n_samples, n_coordinates]
         Barycentric coordinates (closed) in simplex space.
+    out : 2d numpy array, shape [n_samples, n_coordinates-1], optional
+        Array to store the result.
+    basis : 2d numpy array, shape [n_coordinates-1, n_coordinates], optional
+        Orthonormal basis (rows) of the clr hyperplane, e.g. from
+        compoda.sbp.sbp_basis. Helmert basis if None.
 
     Returns
     -------
@@ -335,21 +417,20 @@ def ilr_transformation(data):
         DOI: 10.1002/9781119003144
 
     """
-    dims = data.shape
-    out = np.zeros((dims[0], dims[1]-1))
-    helmertian = helmert(dims[1]).T
-    for i in range(data.shape[0]):
-        out[i, :] = np.dot(np.log(data[i, :]), helmertian)
-    return out
+    if basis is None:
+        basis = helmert_basis(data.shape[1], _float_dtype(data))
+    return np.matmul(np.log(data), basis.T, out=out)
 
 
-def inverse_ilr_transformation(data):
-    """Inverse isometric logratio transformation (not vectorized).
+def inverse_ilr_transformation(data, basis=None):
+    """Inverse isometric logratio transformation.
 
     Parameters
     ----------
     data : 2d numpy array, shape [n_samples, n_coordinates]
         Isometric log-ratio transformed coordinates in real space.
+    basis : 2d numpy array, shape [n_coordinates, n_coordinates+1], optional
+        Basis used in the forward transformation. Helmert basis if None.
 
     Returns
     -------
@@ -364,12 +445,10 @@ def inverse_ilr_transformation(data):
         DOI: 10.1002/9781119003144
 
     """
-    dims = data.shape
-    out = np.zeros((dims[0], dims[1]+1))
-    helmertian = helmert(dims[1]+1)
-    for i in range(data.shape[0]):
-        out[i, :] = np.exp(np.dot(data[i, :], helmertian))
-    return closure(out)
+    if basis is None:
+        basis = helmert_basis(data.shape[1]+1, _float_dtype(data))
+    out = np.dot(data, basis)
+    return _exp_closure(out)
 
 
 def sample_center(data):
@@ -393,8 +472,8 @@ def sample_center(data):
         DOI: 10.1002/9781119003144
 
     """
-    dims = data.shape
-    center = np.prod(np.power(data, 1./dims[0]), axis=0)
+    log_mean = np.mean(np.log(data), axis=0)
+    center = np.exp(log_mean - np.max(log_mean))  # avoids underflow
     return closure(center[None, :])
 
 
@@ -407,7 +486,7 @@ def sample_total_variance(data, center=None):
         Barycentric coordinates (closed) of data in simplex space.
 
     center : 2d numpy array, shape [1, n_coordinates]
-        Central tendency of a compositional sample.
+        Central tendency of a compositional sample. Broadcast to all samples.
 
     Returns
     -------
@@ -425,13 +504,53 @@ def sample_total_variance(data, center=None):
     if center is None:
         center = sample_center(data)
     dims = data.shape
-    temp = 0
-    center = np.ones(dims) * center
-    temp = np.sum(aitchison_dist(data, center)**2, axis=0)
-    tot_var = 1./dims[0] * temp
+    dtype = _float_dtype(data)
+    center = np.asarray(center, dtype=dtype)  # broadcast, not tiled
+    temp = np.sum(aitchison_dist(data, center)**2, axis=0, dtype=np.float64)
+    tot_var = dtype.type(1./dims[0] * temp)
     return tot_var
 
 
+def variation_matrix(data):
+    """Variation matrix, variances of all pairwise logratios.
+
+    All entries are derived from the clr covariance matrix C as
+    T_ij = C_ii + C_jj - 2 * C_ij, so no pairwise logratios are formed.
+
+    Parameters
+    ----------
+    data : 2d numpy array, shape [n_samples, n_coordinates]
+        Barycentric coordinates (closed or not) of data in simplex space.
+
+    Returns
+    -------
+    var_mat : 2d numpy array, shape [n_coordinates, n_coordinates]
+        Variance of log(x_i / x_j) in entry (i, j). The sum of all entries
+        divided by 2 * n_coordinates is the sample total variance.
+
+    Reference
+    ---------
+    [1] Pawlowsky-Glahn, V., Egozcue, J. J., & Tolosana-Delgado, R.
+        (2015). Modelling and Analysis of Compositional Data, pg. 66.
+        Chichester, UK: John Wiley & Sons, Ltd.
+        DOI: 10.1002/9781119003144
+
+    """
+    clr = clr_transformation(data)
+    clr -= np.mean(clr, axis=0)
+    cov = np.dot(clr.T, clr) / data.shape[0]
+    return _covariance_to_variation(cov)
+
+
+def _covariance_to_variation(cov):
+    """Variation matrix from the clr covariance matrix."""
+    var = np.diag(cov)
+    var_mat = var[:, None] + var[None, :]
+    var_mat -= 2 * cov
+    np.maximum(var_mat, 0, out=var_mat)  # rounding on the diagonal
+    return var_mat
+
+
 def sample_sstd(data):
     """Sample simplicial standard deviation.
 
@@ -0,0 +1,102 @@
+"""Aitchison distance matrices between sets of compositions."""
+
+from __future__ import division
+import numpy as np
+from compoda.core import clr_transformation
+from compoda.parallel import for_each_chunk
+
+DEFAULT_BLOCK_SIZE = 1024
+
+
+def _gram_distances(clr_x, sq_x, clr_y, sq_y):
+    """Euclidean distances from the Gram identity |a-b|^2=|a|^2+|b|^2-2ab."""
+    out = np.dot(clr_x, clr_y.T)
+    out *= -2.
+    out += sq_x[:, None]
+    out += sq_y[None, :]
+    np.maximum(out, 0, out=out)  # rounding errors can give small negatives
+    return np.sqrt(out, out=out)
+
+
+def aitchison_cdist(x, y, block_size=DEFAULT_BLOCK_SIZE, n_workers=None):
+    """Aitchison distances between each pair of compositions of two sets.
+
+    Parameters
+    ----------
+    x : 2d numpy array, shape [n_samples_x, n_coordinates]
+        Barycentric coordinates (closed) in simplex space.
+    y : 2d numpy array, shape [n_samples_y, n_coordinates]
+        Barycentric coordinates (closed) in simplex space.
+    block_size : int, positive
+        Number of rows of x processed at once. Temporary memory is bounded by
+        block_size * n_samples_y.
+    n_workers : int, optional
+        Number of threads. See compoda.parallel.get_n_workers.
+
+    Returns
+    -------
+    out : 2d numpy array, shape [n_samples_x, n_samples_y]
+        Aitchison distance between x[i] and y[j] in out[i, j].
+
+    """
+    clr_x = clr_transformation(x)
+    clr_y = clr_transformation(y)
+    sq_x = np.sum(clr_x * clr_x, axis=1)
+    sq_y = np.sum(clr_y * clr_y, axis=1)
+    out = np.empty((clr_x.shape[0], clr_y.shape[0]),
+                   dtype=np.result_type(clr_x, clr_y))
+
+    def _task(block):
+        out[block] = _gram_distances(clr_x[block], sq_x[block], clr_y, sq_y)
+
+    for_each_chunk(_task, clr_x.shape[0], n_workers=n_workers,
+                   chunk_size=block_size)
+    return out
+
+
+def aitchison_pdist(x, condensed=True, block_size=DEFAULT_BLOCK_SIZE,
+                    n_workers=None):
+    """Pairwise Aitchison distances within a set of compositions.
+
+    Parameters
+    ----------
+    x : 2d numpy array, shape [n_samples, n_coordinates]
+        Barycentric coordinates (closed) in simplex space.
+    condensed : bool
+        Return the upper triangle as a condensed vector, in the same order as
+        scipy.spatial.distance.pdist. Otherwise return the full matrix.
+    block_size : int, positive
+        Number of rows processed at once. Temporary memory is bounded by
+        block_size * n_samples.
+    n_workers : int, optional
+        Number of threads. See compoda.parallel.get_n_workers.
+
+    Returns
+    -------
+    out : 1d numpy array, shape [n_samples * (n_samples - 1) / 2] or
+          2d numpy array, shape [n_samples, n_samples]
+        Aitchison distances between all pairs of samples.
+
+    """
+    if not condensed:
+        out = aitchison_cdist(x, x, block_size=block_size,
+                              n_workers=n_workers)
+        np.fill_diagonal(out, 0)
+        return out
+
+    clr_x = clr_transformation(x)
+    sq_x = np.sum(clr_x * clr_x, axis=1)
+    n = clr_x.shape[0]
+    out = np.empty(n * (n - 1) // 2, dtype=clr_x.dtype)
+
+    def _task(block):
+        # Only distances to the following rows are needed (upper triangle)
+        start = block.start
+        dist = _gram_distances(clr_x[block], sq_x[block],
+                               clr_x[start + 1:], sq_x[start + 1:])
+        for i in range(block.start, block.stop):
+            offset = i * n - i * (i + 1) // 2
+            out[offset:offset + n - i - 1] = dist[i - start, i - start:]
+
+    for_each_chunk(_task, n, n_workers=n_workers, chunk_size=block_size)
+    return out
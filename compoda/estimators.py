@@ -0,0 +1,145 @@
+"""Scikit-learn compatible transformers (requires scikit-learn).
+
+Logratio coordinates do not depend on the closure constant, so CLR and ILR
+never close (or copy) their input. CompositionalScaler accumulates its
+statistics with compoda.streaming.StreamingStatistics and therefore supports
+partial_fit on chunks of large datasets.
+
+"""
+
+from __future__ import division
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils import check_array
+from sklearn.utils.validation import check_is_fitted, FLOAT_DTYPES
+import compoda.core as coda
+from compoda.streaming import StreamingStatistics, fit_statistics
+
+
+def _check_compositions(X):
+    """Validate input without copying float arrays."""
+    return check_array(X, dtype=FLOAT_DTYPES, copy=False)
+
+
+class CLR(TransformerMixin, BaseEstimator):
+    """Centered logratio transformation.
+
+    Stateless; see compoda.core.clr_transformation.
+
+    """
+
+    def fit(self, X, y=None):
+        """Check the input and store the number of parts."""
+        self.n_features_in_ = _check_compositions(X).shape[1]
+        return self
+
+    def transform(self, X):
+        """Transform compositions to clr coordinates."""
+        return coda.clr_transformation(_check_compositions(X))
+
+    def inverse_transform(self, X):
+        """Transform clr coordinates to closed compositions."""
+        return coda.inverse_clr_transformation(_check_compositions(X))
+
+
+class ILR(TransformerMixin, BaseEstimator):
+    """Isometric logratio transformation with the Helmert basis.
+
+    Stateless; see compoda.core.ilr_transformation.
+
+    """
+
+    def fit(self, X, y=None):
+        """Check the input and store the number of parts."""
+        self.n_features_in_ = _check_compositions(X).shape[1]
+        return self
+
+    def transform(self, X):
+        """Transform compositions to ilr coordinates."""
+        return coda.ilr_transformation(_check_compositions(X))
+
+    def inverse_transform(self, X):
+        """Transform ilr coordinates to closed compositions."""
+        return coda.inverse_ilr_transformation(_check_compositions(X))
+
+
+class CompositionalScaler(TransformerMixin, BaseEstimator):
+    """Center and standardize compositions in the simplex.
+
+    Compositions are perturbed by the inverse of the sample center and
+    powered by the inverse square root of the sample total variance.
+
+    Parameters
+    ----------
+    with_center : bool
+        Perturb by the inverse of the sample center.
+    with_scale : bool
+        Power by the inverse square root of the total variance.
+
+    Attributes
+    ----------
+    center_ : 2d numpy array, shape [1, n_features]
+        Sample center.
+    totvar_ : float
+        Sample total variance.
+    n_samples_seen_ : int
+        Number of samples used for the statistics.
+
+    """
+
+    def __init__(self, with_center=True, with_scale=True):
+        self.with_center = with_center
+        self.with_scale = with_scale
+
+    def _reset(self):
+        for attr in ['_stats', 'center_', 'totvar_', 'n_samples_seen_']:
+            if hasattr(self, attr):
+                delattr(self, attr)
+
+    def fit(self, X, y=None):
+        """Compute sample center and total variance."""
+        self._reset()
+        return self.partial_fit(X)
+
+    def partial_fit(self, X, y=None):
+        """Update sample center and total variance with a chunk of data."""
+        X = _check_compositions(X)
+        if not hasattr(self, '_stats'):
+            self._stats = StreamingStatistics()
+            self.n_features_in_ = X.shape[1]
+        elif X.shape[1] != self.n_features_in_:
+            raise ValueError('X has {} parts, but CompositionalScaler was '
+                             'fitted with {} parts.'
+                             .format(X.shape[1], self.n_features_in_))
+        fit_statistics(X, self._stats)
+        self.center_ = self._stats.center
+        self.totvar_ = self._stats.total_variance
+        self.n_samples_seen_ = self._stats.n_samples
+        return self
+
+    def transform(self, X):
+        """Center and standardize compositions.
+
+        Only the output array is allocated; operations run in place on it.
+        """
+        check_is_fitted(self, 'center_')
+        X = _check_compositions(X)
+        if self.with_center:
+            out = coda.perturb(X, self.center_**-1.)
+        else:
+            out = coda.closure(X)
+        if self.with_scale:
+            coda.power(out, np.power(self.totvar_, -1./2.), out=out)
+        return out
+
+    def inverse_transform(self, X):
+        """Undo centering and standardization."""
+        check_is_fitted(self, 'center_')
+        X = _check_compositions(X)
+        if self.with_scale:
+            out = coda.power(X, np.power(self.totvar_, 1./2.))
+        else:
+            out = coda.closure(X)
+        if self.with_center:
+            coda.perturb(out, self.center_, out=out)
+        return out
@@ -0,0 +1,120 @@
+"""Label-wise (e.g. parcellation) compositional statistics.
+
+All labels are handled together with np.bincount reductions over clr
+coordinates, so the data is read once instead of once per label.
+
+"""
+
+from __future__ import division
+import numpy as np
+from compoda.core import clr_transformation, closure
+from compoda.streaming import iter_chunks, DEFAULT_CHUNK_SIZE
+
+
+def _label_index(labels):
+    """Sorted label values and the position of every sample's label."""
+    labels = np.asarray(labels).ravel()
+    if (np.issubdtype(labels.dtype, np.integer) and labels.size > 0
+            and labels.min() >= 0 and labels.max() <= 4 * labels.size):
+        # Atlas labels are small integers, a lookup table avoids sorting
+        label_values = np.flatnonzero(np.bincount(labels))
+        lookup = np.zeros(label_values[-1] + 1, dtype=np.intp)
+        lookup[label_values] = np.arange(label_values.shape[0])
+        return label_values, lookup[labels]
+    label_values, index = np.unique(labels, return_inverse=True)
+    return label_values, index.ravel()
+
+
+def grouped_statistics(data, labels, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Sample center and total variance of every label in one pass.
+
+    Parameters
+    ----------
+    data : 2d array-like, shape [n_samples, n_coordinates]
+        Compositions (closed or not) in simplex space.
+    labels : 1d array-like, shape [n_samples]
+        Label (e.g. atlas region) of every sample.
+    chunk_size : int, positive
+        Number of rows processed at once.
+
+    Returns
+    -------
+    label_values : 1d numpy array, shape [n_labels]
+        Labels present in the data, sorted.
+    center : 2d numpy array, shape [n_labels, n_coordinates]
+        Sample center of each label.
+    tot_var : 1d numpy array, shape [n_labels]
+        Sample total variance of each label.
+
+    """
+    label_values, index = _label_index(labels)
+    n_labels, n_parts = label_values.shape[0], data.shape[1]
+
+    counts = np.bincount(index, minlength=n_labels)
+    sums = np.zeros((n_labels, n_parts))
+    sq_sums = np.zeros(n_labels)
+    shift = None
+    for chunk in iter_chunks(data.shape[0], chunk_size):
+        clr = clr_transformation(np.asarray(data[chunk], dtype=float))
+        if shift is None:
+            # Shifting by a typical value limits cancellation in the variance
+            shift = np.mean(clr, axis=0)
+        clr -= shift
+        idx = index[chunk]
+        for j in range(n_parts):
+            sums[:, j] += np.bincount(idx, weights=clr[:, j],
+                                      minlength=n_labels)
+        sq_sums += np.bincount(idx, weights=np.einsum('ij,ij->i', clr, clr),
+                               minlength=n_labels)
+
+    mean = sums / counts[:, None]
+    tot_var = sq_sums / counts - np.sum(mean * mean, axis=1)
+    np.maximum(tot_var, 0, out=tot_var)
+    mean += shift
+    center = closure(np.exp(mean - np.max(mean, axis=1, keepdims=True)))
+    return label_values, center, tot_var
+
+
+def grouped_sample_center(data, labels, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Sample center of every label.
+
+    See grouped_statistics.
+
+    Returns
+    -------
+    label_values : 1d numpy array, shape [n_labels]
+    center : 2d numpy array, shape [n_labels, n_coordinates]
+
+    """
+    label_values, center, _ = grouped_statistics(data, labels, chunk_size)
+    return label_values, center
+
+
+def grouped_sample_total_variance(data, labels, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Sample total variance of every label.
+
+    See grouped_statistics.
+
+    Returns
+    -------
+    label_values : 1d numpy array, shape [n_labels]
+    tot_var : 1d numpy array, shape [n_labels]
+
+    """
+    label_values, _, tot_var = grouped_statistics(data, labels, chunk_size)
+    return label_values, tot_var
+
+
+def grouped_sample_sstd(data, labels, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Sample simplicial standard deviation of every label.
+
+    See grouped_statistics.
+
+    Returns
+    -------
+    label_values : 1d numpy array, shape [n_labels]
+    sstd : 1d numpy array, shape [n_labels]
+
+    """
+    label_values, _, tot_var = grouped_statistics(data, labels, chunk_size)
+    return label_values, np.sqrt(tot_var / (data.shape[1] - 1))
@@ -0,0 +1,173 @@
+"""Replacement of zeros and nondetects before closure.
+
+Logratio methods are undefined for zero (or negative) parts. The sample-wise
+replacements below return closed compositions and only rework the rows that
+contain such parts. Neighborhood replacement fills voxel grids (before
+closure) and only visits the affected voxels.
+
+"""
+
+from __future__ import division
+import itertools
+import numpy as np
+from compoda.core import closure, _float_dtype
+from compoda.streaming import iter_chunks, DEFAULT_CHUNK_SIZE
+
+
+def _affected_rows(data):
+    """Indices of samples with at least one non-positive part."""
+    return np.flatnonzero(np.any(data <= 0, axis=1))
+
+
+def multiplicative_replacement(data, delta=None, out=None):
+    """Multiplicative replacement of zeros [1].
+
+    Zero parts are replaced by delta and the non-zero parts of the same
+    sample are scaled by (1 - n_zeros * delta), which keeps the ratios of
+    non-zero parts. Samples with only zeros (e.g. masked voxels) become the
+    neutral (uniform) composition.
+
+    Parameters
+    ----------
+    data : 2d numpy array, shape [n_samples, n_measurements]
+        Data with non-negative values. Non-positive values count as zeros.
+    delta : float, optional
+        Replacement value in closed units (sum of parts is 1). Defaults to
+        1 / n_measurements**2.
+    out : 2d numpy array, shape [n_samples, n_measurements], optional
+        Array to store the result. Use out=data for in-place imputation.
+
+    Returns
+    -------
+    out : 2d numpy array, shape [n_samples, n_measurements]
+        Closed data without zeros.
+
+    Reference
+    ---------
+    [1] Martin-Fernandez, J. A., Barcelo-Vidal, C., & Pawlowsky-Glahn, V.
+        (2003). Dealing with zeros and missing values in compositional data
+        sets using nonparametric imputation. Mathematical Geology, 35(3),
+        253-278. DOI: 10.1023/A:1023866030544
+
+    """
+    n_parts = data.shape[1]
+    if delta is None:
+        delta = 1. / n_parts**2
+    rows = _affected_rows(data)
+    sub = np.maximum(data[rows], 0).astype(_float_dtype(data))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = closure(data, out=out)
+        closure(sub, out=sub)
+    zeros = ~(sub > 0)  # also catches rows of only zeros (nan after closure)
+    sub *= 1 - delta * np.sum(zeros, axis=1, keepdims=True)
+    sub[zeros] = delta
+    out[rows] = closure(sub)
+    return out
+
+
+def detection_limit_replacement(data, detection_limit, fraction=0.65,
+                                out=None):
+    """Replace nondetects by a fraction of the detection limit, then close.
+
+    Closure after the replacement keeps the ratios of the detected parts.
+
+    Parameters
+    ----------
+    data : 2d numpy array, shape [n_samples, n_measurements]
+        Raw (unclosed) data. Non-positive values are treated as nondetects.
+    detection_limit : float or 1d numpy array, shape [n_measurements]
+        Detection limit of each part, in the units of data.
+    fraction : float
+        Nondetects are replaced by fraction * detection_limit. 0.65 is the
+        common choice [1].
+    out : 2d numpy array, shape [n_samples, n_measurements], optional
+        Array to store the result. Use out=data for in-place imputation.
+
+    Returns
+    -------
+    out : 2d numpy array, shape [n_samples, n_measurements]
+        Closed data without zeros.
+
+    Reference
+    ---------
+    [1] Martin-Fernandez, J. A., Barcelo-Vidal, C., & Pawlowsky-Glahn, V.
+        (2003). Dealing with zeros and missing values in compositional data
+        sets using nonparametric imputation. Mathematical Geology, 35(3),
+        253-278. DOI: 10.1023/A:1023866030544
+
+    """
+    rows = _affected_rows(data)
+    sub = data[rows].astype(_float_dtype(data))
+    limit = np.broadcast_to(np.asarray(detection_limit, dtype=sub.dtype),
+                            sub.shape)
+    nondetect = sub <= 0
+    sub[nondetect] = fraction * limit[nondetect]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = closure(data, out=out)
+    out[rows] = closure(sub)
+    return out
+
+
+def neighborhood_replacement(volume, mask=None, size=3,
+                             chunk_size=DEFAULT_CHUNK_SIZE):
+    """Replace zeros in voxel grids by the mean of their neighbors.
+
+    Only voxels that have a non-positive part are visited. Each such part is
+    replaced by the mean of the positive values of the same part within a
+    cubic neighborhood. Parts without positive neighbors get the smallest
+    positive value of that part in the volume.
+
+    Parameters
+    ----------
+    volume : numpy array, shape [..., n_measurements]
+        Image (2D or 3D grid of voxels) with the measurements in the last
+        dimension. Not modified.
+    mask : numpy array of bool, shape volume.shape[:-1], optional
+        Only voxels inside the mask are imputed. All voxels when None.
+    size : int, odd
+        Width of the neighborhood in every spatial dimension.
+    chunk_size : int, positive
+        Number of affected voxels processed at once.
+
+    Returns
+    -------
+    out : numpy array, shape [..., n_measurements]
+        Copy of the volume without non-positive values inside the mask.
+
+    """
+    out = np.array(volume, dtype=_float_dtype(volume))
+    grid = out.shape[:-1]
+    affected = np.any(out <= 0, axis=-1)
+    if mask is not None:
+        affected &= mask.astype(bool)
+    coords = np.array(np.nonzero(affected))  # [n_dims, n_affected]
+
+    radius = size // 2
+    offsets = np.array(list(itertools.product(range(-radius, radius + 1),
+                                              repeat=len(grid))))
+    upper = np.array(grid)[:, None, None] - 1
+
+    missing = False
+    for chunk in iter_chunks(coords.shape[1], chunk_size):
+        # neighbor coordinates, shape [n_dims, n_chunk, n_offsets]
+        nbr = coords[:, chunk, None] + offsets.T[:, None, :]
+        np.clip(nbr, 0, upper, out=nbr)
+        values = volume[tuple(nbr)]  # [n_chunk, n_offsets, n_measurements]
+        positive = values > 0
+        sums = np.sum(np.where(positive, values, 0), axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums / np.sum(positive, axis=1)  # nan without neighbors
+        voxels = out[tuple(coords[:, chunk])]
+        replace = voxels <= 0
+        voxels[replace] = means[replace]
+        missing |= np.any(np.isnan(voxels))
+        out[tuple(coords[:, chunk])] = voxels
+
+    if missing:  # parts without any positive neighbor
+        flat = np.reshape(volume, (-1, volume.shape[-1]))
+        min_pos = np.fmin.reduce(flat, axis=0, where=flat > 0,
+                                 initial=np.inf)
+        voxels = out[tuple(coords)]
+        voxels = np.where(np.isnan(voxels), min_pos, voxels)
+        out[tuple(coords)] = voxels
+    return out
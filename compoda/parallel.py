@@ -0,0 +1,194 @@
+"""Multi-threaded execution of sample-wise compositional functions.
+
+Samples are split into fixed-size row chunks which are processed on a thread
+pool. NumPy releases the GIL inside its ufuncs and BLAS calls, therefore
+threads are sufficient to use multiple cores. Chunk boundaries only depend on
+the chunk size (not on the number of workers), so results are deterministic.
+
+"""
+
+from __future__ import division
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import compoda.core as coda
+from compoda.streaming import iter_chunks
+
+DEFAULT_CHUNK_SIZE = 2**15
+
+_N_WORKERS = None
+
+
+def set_n_workers(n_workers=None):
+    """Set the default number of worker threads.
+
+    Parameters
+    ----------
+    n_workers : int or None
+        Number of threads. None uses the number of available CPUs.
+
+    """
+    global _N_WORKERS
+    if n_workers is not None and n_workers < 1:
+        raise ValueError('n_workers must be a positive integer or None.')
+    _N_WORKERS = n_workers
+
+
+def get_n_workers(n_workers=None):
+    """Resolve the number of worker threads.
+
+    Parameters
+    ----------
+    n_workers : int or None
+        Requested number of threads. None falls back to the value given to
+        set_n_workers, then to the number of available CPUs.
+
+    Returns
+    -------
+    n_workers : int
+        Number of threads to be used.
+
+    """
+    if n_workers is None:
+        n_workers = _N_WORKERS
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    return n_workers
+
+
+def for_each_chunk(task, n_samples, n_workers=None,
+                   chunk_size=DEFAULT_CHUNK_SIZE):
+    """Call a task for every row chunk on a thread pool.
+
+    Parameters
+    ----------
+    task : callable
+        Function taking a row slice. Tasks should write their results into
+        disjoint parts of a shared output.
+    n_samples : int
+        Number of rows to be covered.
+    n_workers : int, optional
+        Number of threads. See get_n_workers.
+    chunk_size : int, optional
+        Number of rows per task.
+
+    """
+    chunks = list(iter_chunks(n_samples, chunk_size))
+    n_workers = get_n_workers(n_workers)
+    if n_workers == 1 or len(chunks) < 2:
+        for chunk in chunks:
+            task(chunk)
+    else:
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            list(executor.map(task, chunks))
+
+
+def map_chunks(func, *arrays, n_workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Apply a sample-wise function to row chunks on a thread pool.
+
+    Parameters
+    ----------
+    func : callable
+        Function taking row chunks of all arrays and returning either a 2d
+        array or a 1d array with one value per row.
+    *arrays : numpy arrays, shape [n_samples, ...]
+        Row-aligned inputs. Arrays with a different number of rows (e.g. a
+        single reference of shape [1, n_measurements]) are passed whole to
+        every task so that they are broadcast.
+    n_workers : int, optional
+        Number of threads. See get_n_workers.
+    chunk_size : int, optional
+        Number of rows per task.
+
+    Returns
+    -------
+    out : numpy array, shape [n_samples, ...]
+        Concatenated output of func.
+
+    """
+    # a broadcast reference can come first, take the largest row count
+    rows = [a.shape[0] for a in arrays if np.ndim(a) > 1]
+    n_samples = max(rows) if rows else arrays[0].shape[0]
+    if n_samples <= chunk_size:
+        return func(*arrays)
+
+    def _rows(chunk):
+        return [a[chunk] if np.ndim(a) > 1 and a.shape[0] == n_samples else a
+                for a in arrays]
+
+    # First chunk determines output shape and type
+    first = func(*_rows(slice(0, chunk_size)))
+    out = np.empty((n_samples,) + first.shape[1:], dtype=first.dtype)
+    out[:chunk_size] = first
+
+    def _task(chunk):
+        chunk = slice(chunk.start + chunk_size, chunk.stop + chunk_size)
+        out[chunk] = func(*_rows(chunk))
+
+    for_each_chunk(_task, n_samples - chunk_size, n_workers=n_workers,
+                   chunk_size=chunk_size)
+    return out
+
+
+def closure(data, k=1.0, n_workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Multi-threaded compoda.core.closure."""
+    return map_chunks(lambda x: coda.closure(x, k), data,
+                      n_workers=n_workers, chunk_size=chunk_size)
+
+
+def alr_transformation(data, n_workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Multi-threaded compoda.core.alr_transformation."""
+    return map_chunks(coda.alr_transformation, data,
+                      n_workers=n_workers, chunk_size=chunk_size)
+
+
+def inverse_alr_transformation(data, n_workers=None,
+                               chunk_size=DEFAULT_CHUNK_SIZE):
+    """Multi-threaded compoda.core.inverse_alr_transformation."""
+    return map_chunks(coda.inverse_alr_transformation, data,
+                      n_workers=n_workers, chunk_size=chunk_size)
+
+
+def clr_transformation(data, n_workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Multi-threaded compoda.core.clr_transformation."""
+    return map_chunks(coda.clr_transformation, data,
+                      n_workers=n_workers, chunk_size=chunk_size)
+
+
+def inverse_clr_transformation(data, n_workers=None,
+                               chunk_size=DEFAULT_CHUNK_SIZE):
+    """Multi-threaded compoda.core.inverse_clr_transformation."""
+    return map_chunks(coda.inverse_clr_transformation, data,
+                      n_workers=n_workers, chunk_size=chunk_size)
+
+
+def ilr_transformation(data, n_workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Multi-threaded compoda.core.ilr_transformation."""
+    return map_chunks(coda.ilr_transformation, data,
+                      n_workers=n_workers, chunk_size=chunk_size)
+
+
+def inverse_ilr_transformation(data, n_workers=None,
+                               chunk_size=DEFAULT_CHUNK_SIZE):
+    """Multi-threaded compoda.core.inverse_ilr_transformation."""
+    return map_chunks(coda.inverse_ilr_transformation, data,
+                      n_workers=n_workers, chunk_size=chunk_size)
+
+
+def aitchison_inner_product(x, y, n_workers=None,
+                            chunk_size=DEFAULT_CHUNK_SIZE):
+    """Multi-threaded compoda.core.aitchison_inner_product."""
+    return map_chunks(coda.aitchison_inner_product, x, y,
+                      n_workers=n_workers, chunk_size=chunk_size)
+
+
+def aitchison_norm(x, n_workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Multi-threaded compoda.core.aitchison_norm."""
+    return map_chunks(coda.aitchison_norm, x,
+                      n_workers=n_workers, chunk_size=chunk_size)
+
+
+def aitchison_dist(x, y, n_workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Multi-threaded compoda.core.aitchison_dist."""
+    return map_chunks(coda.aitchison_dist, x, y,
+                      n_workers=n_workers, chunk_size=chunk_size)
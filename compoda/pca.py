@@ -0,0 +1,270 @@
+"""Principal component analysis of compositions in clr coordinates.
+
+Compositions are centered with their sample center (the clr mean) and
+factorized in clr space [1]. Three solvers are available:
+
+    'exact'       SVD of the whole centered clr matrix (held in memory).
+    'covariance'  Eigendecomposition of the clr covariance, accumulated in
+                  one chunked pass. Suited to tall data with moderate D.
+    'randomized'  Randomized subspace iteration with chunked passes over
+                  the data. Memory grows with D * n_components instead of
+                  D**2, for many parts and few components.
+
+Variances are normalized by the number of samples, so the explained
+variances of all components sum to the sample total variance.
+
+Reference
+---------
+[1] Pawlowsky-Glahn, V., Egozcue, J. J., & Tolosana-Delgado, R.
+    (2015). Modelling and Analysis of Compositional Data, pg. 118.
+    Chichester, UK: John Wiley & Sons, Ltd.
+    DOI: 10.1002/9781119003144
+
+"""
+
+from __future__ import division
+import numpy as np
+from compoda.core import (clr_transformation, inverse_clr_transformation,
+                          closure)
+from compoda.streaming import (StreamingCovariance, fit_statistics,
+                               iter_chunks, apply_chunked, DEFAULT_CHUNK_SIZE)
+
+METHODS = ('auto', 'exact', 'covariance', 'randomized')
+
+
+def _flip_signs(components):
+    """Make the largest loading of every component positive."""
+    idx = np.argmax(np.abs(components), axis=1)
+    signs = np.sign(components[np.arange(components.shape[0]), idx])
+    signs[signs == 0] = 1
+    return components * signs[:, None]
+
+
+class CompositionalPCA(object):
+    """Principal component analysis of clr coordinates.
+
+    Parameters
+    ----------
+    n_components : int, optional
+        Number of components. All n_coordinates-1 informative components
+        if None.
+    method : str, 'auto', 'exact', 'covariance' or 'randomized'
+        Solver, see the module documentation. 'auto' uses 'exact' for data
+        that fits in one chunk, 'randomized' for few components of many
+        parts and 'covariance' otherwise.
+    n_iter : int
+        Number of power iterations of the randomized solver.
+    random_state : int, optional
+        Seed of the randomized solver.
+    chunk_size : int, positive
+        Number of rows processed at once.
+
+    Attributes
+    ----------
+    center_ : 2d numpy array, shape [1, n_coordinates]
+        Sample center.
+    clr_mean_ : 1d numpy array, shape [n_coordinates]
+        Clr coordinates of the sample center.
+    components_ : 2d numpy array, shape [n_components, n_coordinates]
+        Principal axes (loadings) in clr space, orthonormal rows.
+    explained_variance_ : 1d numpy array, shape [n_components]
+        Variance of the scores along each component.
+    explained_variance_ratio_ : 1d numpy array, shape [n_components]
+        Explained variance divided by the sample total variance.
+    n_samples_seen_ : int
+        Number of samples used for fitting.
+
+    """
+
+    def __init__(self, n_components=None, method='auto', n_iter=4,
+                 random_state=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        if method not in METHODS:
+            raise ValueError('method must be one of {}.'.format(METHODS))
+        self.n_components = n_components
+        self.method = method
+        self.n_iter = n_iter
+        self.random_state = random_state
+        self.chunk_size = chunk_size
+
+    def _select_method(self, n_samples, n_parts, n_components):
+        if self.method != 'auto':
+            return self.method
+        if n_samples <= self.chunk_size:
+            return 'exact'
+        if n_parts > 500 and n_components < n_parts // 10:
+            return 'randomized'
+        return 'covariance'
+
+    def fit(self, data):
+        """Estimate center and principal axes.
+
+        Parameters
+        ----------
+        data : 2d array-like, shape [n_samples, n_coordinates]
+            Compositions (closed or not), e.g. a np.memmap. Zeros should be
+            imputed.
+
+        Returns
+        -------
+        self : CompositionalPCA
+
+        """
+        n_samples, n_parts = data.shape
+        n_components = self.n_components
+        if n_components is None:
+            n_components = n_parts - 1
+        if not 0 < n_components < n_parts:
+            raise ValueError('n_components must be in range [1, {}].'
+                             .format(n_parts - 1))
+        method = self._select_method(n_samples, n_parts, n_components)
+        if method == 'exact':
+            self._fit_exact(data)
+        elif method == 'covariance':
+            self._fit_covariance(data)
+        else:
+            self._fit_randomized(data, n_components)
+        self.components_ = _flip_signs(self.components_[:n_components])
+        self.explained_variance_ = self.explained_variance_[:n_components]
+        self.explained_variance_ratio_ = (self.explained_variance_
+                                          / self.total_variance_)
+        self.center_ = closure(np.exp(self.clr_mean_
+                                      - np.max(self.clr_mean_))[None, :])
+        self.n_samples_seen_ = n_samples
+        return self
+
+    def _fit_exact(self, data):
+        clr = clr_transformation(np.asarray(data, dtype=float))
+        self.clr_mean_ = np.mean(clr, axis=0)
+        clr -= self.clr_mean_
+        _, sing_val, v_t = np.linalg.svd(clr, full_matrices=False)
+        self.components_ = v_t
+        self.explained_variance_ = sing_val**2 / clr.shape[0]
+        self.total_variance_ = np.sum(self.explained_variance_)
+
+    def _fit_covariance(self, data):
+        stats = fit_statistics(data, StreamingCovariance(data.shape[1]),
+                               self.chunk_size)
+        eig_val, eig_vec = np.linalg.eigh(stats.covariance)
+        order = np.argsort(eig_val)[::-1]
+        self.clr_mean_ = stats.clr_mean
+        self.components_ = eig_vec[:, order].T
+        self.explained_variance_ = np.maximum(eig_val[order], 0)
+        self.total_variance_ = stats.total_variance
+
+    def _covariance_product(self, data, basis):
+        """Product of the clr covariance with a basis, chunk by chunk."""
+        out = np.zeros(basis.shape)
+        for chunk in iter_chunks(data.shape[0], self.chunk_size):
+            clr = clr_transformation(np.asarray(data[chunk], dtype=float))
+            clr -= self.clr_mean_
+            out += np.dot(clr.T, np.dot(clr, basis))
+        return out / data.shape[0]
+
+    def _fit_randomized(self, data, n_components):
+        stats = fit_statistics(data, chunk_size=self.chunk_size)
+        self.clr_mean_ = stats.clr_mean
+        self.total_variance_ = stats.total_variance
+
+        rng = np.random.RandomState(self.random_state)
+        n_basis = min(n_components + 10, data.shape[1])
+        basis = rng.standard_normal((data.shape[1], n_basis))
+        basis -= np.mean(basis, axis=0)  # stay in the clr hyperplane
+        basis = np.linalg.qr(basis)[0]
+        for _ in range(self.n_iter):
+            basis = np.linalg.qr(self._covariance_product(data, basis))[0]
+        small = np.dot(basis.T, self._covariance_product(data, basis))
+        eig_val, eig_vec = np.linalg.eigh(small)
+        order = np.argsort(eig_val)[::-1]
+        self.components_ = np.dot(basis, eig_vec[:, order]).T
+        self.explained_variance_ = np.maximum(eig_val[order], 0)
+
+    def _transform_chunk(self, data):
+        clr = clr_transformation(data)
+        clr -= self.clr_mean_
+        return np.dot(clr, self.components_.T)
+
+    def transform(self, data, out=None):
+        """Project compositions on the principal axes.
+
+        Parameters
+        ----------
+        data : 2d array-like, shape [n_samples, n_coordinates]
+            Compositions (closed or not).
+        out : 2d array-like, shape [n_samples, n_components], optional
+            Preallocated output (e.g. np.memmap).
+
+        Returns
+        -------
+        scores : 2d array-like, shape [n_samples, n_components]
+            Principal component scores.
+
+        """
+        return apply_chunked(self._transform_chunk, data, out=out,
+                             chunk_size=self.chunk_size)
+
+    def fit_transform(self, data, out=None):
+        """Fit to data, then transform it."""
+        return self.fit(data).transform(data, out=out)
+
+    def inverse_transform(self, scores):
+        """Map scores back to (closed) compositions.
+
+        Parameters
+        ----------
+        scores : 2d numpy array, shape [n_samples, n_components]
+
+        Returns
+        -------
+        out : 2d numpy array, shape [n_samples, n_coordinates]
+            Closed compositions, approximated by the kept components.
+
+        """
+        clr = np.dot(scores, self.components_)
+        clr += self.clr_mean_
+        return inverse_clr_transformation(clr)
+
+    def biplot(self, scores, alpha=0.):
+        """Row and column markers of a compositional biplot.
+
+        Parameters
+        ----------
+        scores : 2d numpy array, shape [n_samples, n_components]
+            Output of transform.
+        alpha : float, range [0, 1]
+            0 gives the covariance biplot (columns approximate standard
+            deviations of clr coordinates), 1 the form biplot (rows are the
+            scores).
+
+        Returns
+        -------
+        rows : 2d numpy array, shape [n_samples, n_components]
+            Markers of the samples.
+        columns : 2d numpy array, shape [n_coordinates, n_components]
+            Markers of the parts (rays).
+
+        """
+        sing_val = np.sqrt(self.explained_variance_ * self.n_samples_seen_)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rows = scores * np.power(sing_val, alpha - 1.)
+        rows[:, sing_val == 0] = 0
+        columns = self.components_.T * np.power(sing_val, 1. - alpha)
+        return rows, columns
+
+
+def compositional_pca(data, n_components=None, method='auto',
+                      chunk_size=DEFAULT_CHUNK_SIZE):
+    """Principal component scores, loadings and explained variances.
+
+    See CompositionalPCA.
+
+    Returns
+    -------
+    scores : 2d numpy array, shape [n_samples, n_components]
+    loadings : 2d numpy array, shape [n_coordinates, n_components]
+        Principal axes in clr space (columns).
+    explained_variance : 1d numpy array, shape [n_components]
+
+    """
+    pca = CompositionalPCA(n_components, method=method, chunk_size=chunk_size)
+    scores = pca.fit_transform(data)
+    return scores, pca.components_.T, pca.explained_variance_
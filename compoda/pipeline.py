@@ -0,0 +1,162 @@
+"""Fused closure, centering, standardization and logratio transformation.
+
+In log space the usual preprocessing chain
+
+    closure -> perturb(x, center**-1) -> power(x, totvar**-0.5) -> ilr
+
+is a single affine map of the logarithms of the (unclosed) data,
+
+    ilr = totvar**-0.5 * (log(x) @ H.T - ilr(center))
+
+because the Helmert basis H annihilates the constants introduced by
+closure. The same holds for clr coordinates with the centering matrix in
+place of H. The pipeline below learns the center and total variance once
+and then applies the chain with one logarithm and one matrix product per
+chunk.
+
+"""
+
+from __future__ import division
+import numpy as np
+from compoda.core import (helmert_basis, clr_transformation,
+                          inverse_clr_transformation)
+from compoda.streaming import (StreamingStatistics, fit_statistics,
+                               apply_chunked, DEFAULT_CHUNK_SIZE)
+
+
+class Pipeline(object):
+    """Centering, standardization and logratio transformation in one pass.
+
+    Parameters
+    ----------
+    center : bool
+        Perturb the data by the inverse of the sample center.
+    scale : bool
+        Power the data by the inverse square root of the total variance.
+    output : str, 'ilr' or 'clr'
+        Logratio coordinates that are returned by transform.
+    chunk_size : int, positive
+        Number of rows processed at once.
+
+    Attributes
+    ----------
+    center_ : 2d numpy array, shape [1, n_coordinates]
+        Sample center learned by fit.
+    totvar_ : float
+        Sample total variance learned by fit.
+    weights_ : 2d numpy array, shape [n_coordinates, n_outputs]
+        Linear part of the fused map applied to log(data).
+    offset_ : 1d numpy array, shape [n_outputs]
+        Constant part of the fused map.
+
+    """
+
+    def __init__(self, center=True, scale=True, output='ilr',
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+        if output not in ('ilr', 'clr'):
+            raise ValueError("output must be 'ilr' or 'clr'.")
+        self.center = center
+        self.scale = scale
+        self.output = output
+        self.chunk_size = chunk_size
+        self._stats = StreamingStatistics()
+
+    def partial_fit(self, data):
+        """Update center and total variance with a chunk of samples.
+
+        Parameters
+        ----------
+        data : 2d array-like, shape [n_samples, n_coordinates]
+            Compositions (will be closed).
+
+        Returns
+        -------
+        self : Pipeline
+
+        """
+        fit_statistics(data, self._stats, self.chunk_size)
+        self._compile()
+        return self
+
+    def fit(self, data):
+        """Learn center and total variance from data, chunk by chunk.
+
+        Parameters
+        ----------
+        data : 2d array-like, shape [n_samples, n_coordinates]
+            Compositions (will be closed), e.g. a np.memmap.
+
+        Returns
+        -------
+        self : Pipeline
+
+        """
+        self._stats = fit_statistics(data, chunk_size=self.chunk_size)
+        self._compile()
+        return self
+
+    def _compile(self):
+        """Fold closure, centering and scaling into one affine map."""
+        n_coordinates = self._stats.clr_mean.shape[0]
+        self.center_ = self._stats.center
+        self.totvar_ = self._stats.total_variance
+        if self.output == 'ilr':
+            basis = helmert_basis(n_coordinates).T
+        else:
+            basis = np.eye(n_coordinates) - 1. / n_coordinates
+        factor = np.power(self.totvar_, -1./2.) if self.scale else 1.
+        self.weights_ = factor * basis
+        if self.center:
+            self.offset_ = -np.dot(np.log(self.center_[0]), self.weights_)
+        else:
+            self.offset_ = np.zeros(basis.shape[1])
+
+    def _transform_chunk(self, data):
+        out = np.matmul(np.log(data), self.weights_)
+        out += self.offset_
+        return out
+
+    def transform(self, data, out=None):
+        """Apply the fused chain to data.
+
+        Parameters
+        ----------
+        data : 2d array-like, shape [n_samples, n_coordinates]
+            Compositions, closed or not. Zeros should be imputed.
+        out : 2d array-like, shape [n_samples, n_outputs], optional
+            Preallocated output (e.g. np.memmap).
+
+        Returns
+        -------
+        out : 2d array-like, shape [n_samples, n_outputs]
+            Logratio coordinates of centered and standardized compositions.
+
+        """
+        return apply_chunked(self._transform_chunk, data, out=out,
+                             chunk_size=self.chunk_size)
+
+    def fit_transform(self, data, out=None):
+        """Fit to data, then transform it."""
+        return self.fit(data).transform(data, out=out)
+
+    def inverse_transform(self, data):
+        """Map logratio coordinates back to (uncentered) compositions.
+
+        Parameters
+        ----------
+        data : 2d numpy array, shape [n_samples, n_outputs]
+            Output of transform.
+
+        Returns
+        -------
+        out : 2d numpy array, shape [n_samples, n_coordinates]
+            Closed compositions.
+
+        """
+        factor = np.power(self.totvar_, 1./2.) if self.scale else 1.
+        clr = data * factor
+        if self.output == 'ilr':
+            clr = np.dot(clr, helmert_basis(clr.shape[1] + 1))
+        if self.center:
+            clr = clr + clr_transformation(self.center_)
+        return inverse_clr_transformation(clr)
@@ -0,0 +1,400 @@
+"""Chunked (out-of-core) processing of compositional data."""
+
+from __future__ import division
+import numpy as np
+from compoda.core import (closure, perturb, power, ilr_transformation,
+                          clr_transformation, _covariance_to_variation,
+                          _float_dtype)
+
+DEFAULT_CHUNK_SIZE = 2**16
+
+
+def iter_chunks(n_samples, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Generate row slices of fixed size.
+
+    Parameters
+    ----------
+    n_samples : int
+        Number of rows (samples) to be covered.
+    chunk_size : int, positive
+        Maximum number of rows in each slice.
+
+    Yields
+    ------
+    chunk : slice
+        Row slice, the last one can be shorter than chunk_size.
+
+    """
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be a positive integer.')
+    for start in range(0, n_samples, chunk_size):
+        yield slice(start, min(start + chunk_size, n_samples))
+
+
+def apply_chunked(func, data, out=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Apply a sample-wise function to fixed-size row blocks.
+
+    Parameters
+    ----------
+    func : callable
+        Function mapping a 2d array [n_rows, n_measurements] to a 2d array
+        with the same number of rows.
+    data : 2d array-like, shape [n_samples, n_measurements]
+        Input data, e.g. numpy array or np.memmap. Only one block is read
+        into memory at a time.
+    out : 2d array-like, shape [n_samples, n_outputs], optional
+        Preallocated output (e.g. np.memmap). Allocated in memory, in the
+        floating point type of data, when None.
+    chunk_size : int, positive
+        Number of rows processed at once. Bounds the peak memory.
+
+    Returns
+    -------
+    out : 2d array-like, shape [n_samples, n_outputs]
+        Output of func for every row.
+
+    """
+    dtype = _float_dtype(data)
+    for chunk in iter_chunks(data.shape[0], chunk_size):
+        temp = func(np.asarray(data[chunk], dtype=dtype))
+        if out is None:
+            out = np.empty((data.shape[0],) + temp.shape[1:], dtype=dtype)
+        out[chunk] = temp
+    return out
+
+
+class StreamingStatistics(object):
+    """Single-pass estimator of compositional sample statistics.
+
+    Keeps the running mean and the sum of squared deviations of clr
+    coordinates (Welford's algorithm with Chan et al. merging of chunks).
+    The clr mean gives the sample center and the summed clr variances give
+    the total variance, so the whole dataset never has to be held in memory.
+    Partial estimators (e.g. from different subjects or workers) can be
+    combined with merge.
+
+    Parameters
+    ----------
+    n_coordinates : int, optional
+        Number of parts (D). Inferred from the first update when None.
+
+    Attributes
+    ----------
+    n_samples : int
+        Number of samples seen so far.
+    clr_mean : 1d numpy array, shape [n_coordinates]
+        Running mean of clr coordinates.
+    clr_m2 : 1d numpy array, shape [n_coordinates]
+        Running sum of squared deviations from clr_mean.
+
+    """
+
+    def __init__(self, n_coordinates=None):
+        self.n_samples = 0
+        self.clr_mean = None
+        self.clr_m2 = None
+        if n_coordinates is not None:
+            self.clr_mean = np.zeros(n_coordinates)
+            self.clr_m2 = np.zeros(n_coordinates)
+
+    def _combine(self, n_b, mean_b, m2_b):
+        """Combine the current state with statistics of another sample."""
+        if n_b == 0:
+            return self
+        if self.clr_mean is None:
+            self.clr_mean = np.zeros(mean_b.shape)
+            self.clr_m2 = np.zeros(m2_b.shape)
+        n_a = self.n_samples
+        n = n_a + n_b
+        delta = mean_b - self.clr_mean
+        self.clr_mean = self.clr_mean + delta * (n_b / n)
+        self.clr_m2 = self.clr_m2 + m2_b + delta**2 * (n_a * n_b / n)
+        self.n_samples = n
+        return self
+
+    def update(self, data):
+        """Update the statistics with a chunk of samples.
+
+        Parameters
+        ----------
+        data : 2d array-like, shape [n_samples, n_coordinates]
+            Compositions in simplex space, closed or not (clr coordinates do
+            not depend on the closure constant).
+
+        Returns
+        -------
+        self : StreamingStatistics
+
+        """
+        clr = clr_transformation(np.asarray(data, dtype=float))
+        mean_b = np.mean(clr, axis=0)
+        clr -= mean_b
+        m2_b = np.sum(clr * clr, axis=0)
+        return self._combine(clr.shape[0], mean_b, m2_b)
+
+    def merge(self, other):
+        """Merge statistics of another estimator into this one.
+
+        Parameters
+        ----------
+        other : StreamingStatistics
+            Estimator fitted on a different part of the data.
+
+        Returns
+        -------
+        self : StreamingStatistics
+
+        """
+        if other.clr_mean is None:
+            return self
+        return self._combine(other.n_samples, other.clr_mean, other.clr_m2)
+
+    @property
+    def center(self):
+        """Sample center, 2d numpy array, shape [1, n_coordinates]."""
+        center = np.exp(self.clr_mean - np.max(self.clr_mean))
+        return closure(center[None, :])
+
+    @property
+    def total_variance(self):
+        """Sample total variance, float."""
+        return np.sum(self.clr_m2) / self.n_samples
+
+    @property
+    def sstd(self):
+        """Sample simplicial standard deviation, float."""
+        return np.sqrt(self.total_variance / (self.clr_mean.shape[0] - 1))
+
+
+class StreamingCovariance(StreamingStatistics):
+    """Single-pass estimator of the clr covariance and variation matrix.
+
+    Extends StreamingStatistics with the full co-moment matrix of clr
+    coordinates. Partial estimators can be combined with merge, e.g. after
+    processing parts of the data in different workers.
+
+    Parameters
+    ----------
+    n_coordinates : int, optional
+        Number of parts (D). Inferred from the first update when None.
+
+    Attributes
+    ----------
+    clr_comoment : 2d numpy array, shape [n_coordinates, n_coordinates]
+        Running sum of outer products of deviations from clr_mean.
+
+    """
+
+    def __init__(self, n_coordinates=None):
+        super(StreamingCovariance, self).__init__(n_coordinates)
+        self.clr_comoment = None
+        if n_coordinates is not None:
+            self.clr_comoment = np.zeros((n_coordinates, n_coordinates))
+
+    def _combine(self, n_b, mean_b, comoment_b):
+        """Combine the current state with statistics of another sample."""
+        if n_b == 0:
+            return self
+        if self.clr_mean is None:
+            self.clr_mean = np.zeros(mean_b.shape)
+            self.clr_comoment = np.zeros(comoment_b.shape)
+        n_a = self.n_samples
+        n = n_a + n_b
+        delta = mean_b - self.clr_mean
+        self.clr_mean = self.clr_mean + delta * (n_b / n)
+        self.clr_comoment = (self.clr_comoment + comoment_b
+                             + np.outer(delta, delta) * (n_a * n_b / n))
+        self.clr_m2 = np.diag(self.clr_comoment).copy()
+        self.n_samples = n
+        return self
+
+    def update(self, data):
+        """Update the statistics with a chunk of samples.
+
+        Parameters
+        ----------
+        data : 2d array-like, shape [n_samples, n_coordinates]
+            Compositions in simplex space, closed or not.
+
+        Returns
+        -------
+        self : StreamingCovariance
+
+        """
+        clr = clr_transformation(np.asarray(data, dtype=float))
+        mean_b = np.mean(clr, axis=0)
+        clr -= mean_b
+        return self._combine(clr.shape[0], mean_b, np.dot(clr.T, clr))
+
+    def merge(self, other):
+        """Merge statistics of another estimator into this one.
+
+        Parameters
+        ----------
+        other : StreamingCovariance
+            Estimator fitted on a different part of the data.
+
+        Returns
+        -------
+        self : StreamingCovariance
+
+        """
+        if other.clr_mean is None:
+            return self
+        return self._combine(other.n_samples, other.clr_mean,
+                             other.clr_comoment)
+
+    @property
+    def covariance(self):
+        """Covariance of clr coordinates, 2d numpy array."""
+        return self.clr_comoment / self.n_samples
+
+    @property
+    def variation_matrix(self):
+        """Variation matrix, 2d numpy array, shape [n_coordinates]*2."""
+        return _covariance_to_variation(self.covariance)
+
+
+def fit_statistics(data, stats=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Update streaming statistics with data, block by block.
+
+    Shared by the chunked helpers, Pipeline and CompositionalScaler, so all
+    of them accumulate the same single-pass statistics.
+
+    Parameters
+    ----------
+    data : 2d array-like, shape [n_samples, n_coordinates]
+        Compositions (closed or not) in simplex space, e.g. a np.memmap.
+    stats : StreamingStatistics, optional
+        Estimator to be updated, e.g. a StreamingCovariance or the result of
+        an earlier call. A new StreamingStatistics when None.
+    chunk_size : int, positive
+        Number of rows processed at once.
+
+    Returns
+    -------
+    stats : StreamingStatistics
+
+    """
+    if stats is None:
+        stats = StreamingStatistics(data.shape[1])
+    for chunk in iter_chunks(data.shape[0], chunk_size):
+        stats.update(data[chunk])
+    return stats
+
+
+def chunked_variation_matrix(data, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Variation matrix computed block by block.
+
+    Parameters
+    ----------
+    data : 2d array-like, shape [n_samples, n_coordinates]
+        Compositions (closed or not) in simplex space, e.g. a np.memmap.
+    chunk_size : int, positive
+        Number of rows processed at once.
+
+    Returns
+    -------
+    var_mat : 2d numpy array, shape [n_coordinates, n_coordinates]
+        Variance of log(x_i / x_j) in entry (i, j).
+
+    """
+    stats = fit_statistics(data, StreamingCovariance(data.shape[1]),
+                           chunk_size)
+    return stats.variation_matrix
+
+
+def chunked_sample_center(data, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Sample center computed block by block.
+
+    Parameters
+    ----------
+    data : 2d array-like, shape [n_samples, n_coordinates]
+        Compositions (closed or not) in simplex space.
+    chunk_size : int, positive
+        Number of rows processed at once.
+
+    Returns
+    -------
+    center : 2d numpy array, shape [1, n_coordinates]
+        Central tendency of a compositional sample.
+
+    """
+    return fit_statistics(data, chunk_size=chunk_size).center
+
+
+def chunked_sample_total_variance(data, center=None,
+                                  chunk_size=DEFAULT_CHUNK_SIZE):
+    """Sample total variance computed block by block.
+
+    Parameters
+    ----------
+    data : 2d array-like, shape [n_samples, n_coordinates]
+        Compositions (closed or not) in simplex space.
+    center : 2d numpy array, shape [1, n_coordinates], optional
+        Central tendency of the sample. The sample center if None.
+    chunk_size : int, positive
+        Number of rows processed at once.
+
+    Returns
+    -------
+    tot_var : float
+        Global dispersion of compositional sample.
+
+    """
+    stats = fit_statistics(data, chunk_size=chunk_size)
+    if center is None:
+        return stats.total_variance
+    return _total_variance_around(stats, center)
+
+
+def _total_variance_around(stats, center):
+    """Total variance of fitted statistics around a given center."""
+    # Grows by the squared Aitchison distance of center and sample center
+    shift = stats.clr_mean - clr_transformation(np.reshape(center, (1, -1)))[0]
+    return stats.total_variance + np.sum(shift * shift)
+
+
+def standardized_ilr(data, out=None, center=None, totvar=None,
+                     chunk_size=DEFAULT_CHUNK_SIZE):
+    """Closure, centering, standardization and ilr in fixed-size blocks.
+
+    Parameters
+    ----------
+    data : 2d array-like, shape [n_samples, n_coordinates]
+        Compositions, e.g. a np.memmap of voxels. Zeros should be imputed.
+    out : 2d array-like, shape [n_samples, n_coordinates-1], optional
+        Preallocated output (e.g. np.memmap). Allocated in memory when None.
+    center : 2d numpy array, shape [1, n_coordinates], optional
+        Sample center used for centering. Estimated from data when None.
+    totvar : float, optional
+        Sample total variance used for standardization. Estimated from data
+        when None.
+    chunk_size : int, positive
+        Number of rows processed at once. Bounds the peak memory.
+
+    Returns
+    -------
+    out : 2d array-like, shape [n_samples, n_coordinates-1]
+        Isometric logratio coordinates of standardized compositions.
+
+    """
+    if center is None or totvar is None:
+        stats = fit_statistics(data, chunk_size=chunk_size)  # one pass
+        if center is None:
+            center = stats.center
+        if totvar is None:
+            totvar = _total_variance_around(stats, center)
+    inv_center = np.reshape(center, (1, -1))**-1.
+    scale = np.power(totvar, -1./2.)
+
+    def _transform(x):
+        x = closure(x)  # new working buffer, input block is left untouched
+        perturb(x, inv_center, out=x)
+        power(x, scale, out=x)
+        return ilr_transformation(x)
+
+    if out is None:
+        out = np.empty((data.shape[0], data.shape[1] - 1),
+                       dtype=_float_dtype(data))
+    return apply_chunked(_transform, data, out=out, chunk_size=chunk_size)
@@ -0,0 +1,51 @@
+"""Test backend selection and Numba kernels."""
+
+import pytest
+import numpy as np
+import compoda.core as coda
+import compoda.backend as backend
+
+
+def test_set_backend():
+    """Test default backend configuration."""
+    # When
+    backend.set_backend('numpy')
+    # Then
+    assert backend.get_backend() == 'numpy'
+    with pytest.raises(ValueError):
+        backend.set_backend('cuda')
+
+
+def test_fallback_without_numba(monkeypatch):
+    """Test NumPy is used when Numba is missing."""
+    # Given
+    monkeypatch.setattr(backend, 'HAVE_NUMBA', False)
+    data = np.random.random([10, 3])
+    # When
+    with pytest.warns(UserWarning):
+        output = coda.closure(data, backend='numba')
+    # Then
+    assert output == pytest.approx(coda.closure(data, backend='numpy'))
+
+
+def test_numba_kernels():
+    """Test Numba kernels agree with NumPy implementations."""
+    pytest.importorskip('numba')
+    # Given
+    x = np.random.random([1000, 5]) + 0.01
+    y = coda.closure(np.random.random([1000, 5]) + 0.01)
+    for dtype in [np.float64, np.float32]:
+        x_t, y_t = x.astype(dtype), y.astype(dtype)
+        rtol = 1e-12 if dtype == np.float64 else 1e-5
+        # When
+        out_closure = coda.closure(x_t, k=100., backend='numba')
+        out_clr = coda.clr_transformation(y_t, backend='numba')
+        out_dist = coda.aitchison_dist(x_t, y_t, backend='numba')
+        # Then
+        assert out_closure.dtype == dtype
+        assert out_clr.dtype == dtype
+        assert np.allclose(out_closure, coda.closure(x_t, k=100.), rtol=rtol)
+        assert np.allclose(out_clr, coda.clr_transformation(y_t), rtol=rtol,
+                           atol=rtol)
+        assert np.allclose(out_dist, coda.aitchison_dist(x_t, y_t),
+                           rtol=rtol)
@@ -0,0 +1,87 @@
+"""Test simplex color balance."""
+
+import tracemalloc
+import pytest
+import numpy as np
+import compoda.core as coda
+from compoda.balance import ColorBalance, lightness
+
+
+def _reference_balance(data, mask, anorm_thr, light_min, light_max):
+    """Color balance with full-size core operations."""
+    comp = coda.closure(data)
+    p_comp = comp[mask]
+    center = coda.sample_center(p_comp)
+    p_comp = coda.perturb(p_comp, center**-1.)
+    totvar = coda.sample_total_variance(p_comp)
+    p_comp = coda.power(p_comp, np.power(totvar, -1./2.))
+    anorm = coda.aitchison_norm(p_comp)
+    correction = np.minimum(anorm_thr / anorm, 1)
+    comp[mask] = coda.power(p_comp, correction[:, None])
+    light = np.clip(lightness(data), light_min, light_max)
+    return comp * light[:, None]
+
+
+def test_color_balance():
+    """Test chunked color balance against the full-size computation."""
+    # Given
+    data = np.random.random([1000, 3]) + 0.01
+    data[:10, 0] = 1000.  # extreme compositions
+    mask = np.random.random(1000) > 0.2
+    mask[:10] = True
+    light = lightness(data[mask])
+    bound = 1e-4 * (np.max(light) - np.min(light))
+    # When
+    balance = ColorBalance(anorm_thr=1.5, approx_tol=1e-4, chunk_size=128)
+    output = balance.fit_transform(data, mask)
+    # Then
+    assert np.all(np.abs([balance.light_min_, balance.light_max_]
+                         - np.percentile(light, [1, 99])) <= bound)
+    expected = _reference_balance(data, mask, 1.5, balance.light_min_,
+                                  balance.light_max_)
+    assert np.allclose(output, expected)
+    anorm = coda.aitchison_norm(output[mask])
+    assert np.allclose(anorm[:10], 1.5)
+    assert np.all(anorm <= 1.5 + 1e-8)
+    assert balance.n_samples_seen_ == np.sum(mask)
+
+
+def test_color_balance_save_load(tmp_path):
+    """Test a stored color balance gives the same output."""
+    # Given
+    data = np.random.random([200, 4]) + 0.01
+    balance = ColorBalance(anorm_thr=2., perc_min=5, perc_max=95).fit(data)
+    filename = str(tmp_path / 'balance.npz')
+    # When
+    balance.save(filename)
+    loaded = ColorBalance.load(filename, chunk_size=32)
+    # Then
+    assert loaded.anorm_thr == 2.
+    assert loaded.totvar_ == balance.totvar_
+    assert np.allclose(loaded.transform(data), balance.transform(data))
+    with pytest.raises(ValueError):
+        ColorBalance().transform(data)
+
+
+def test_color_balance_empty_mask():
+    """Test fitting without any masked sample raises a clear error."""
+    # Given
+    data = np.random.random([100, 3]) + 0.01
+    mask = np.zeros(100, dtype=bool)
+    # Then
+    with pytest.raises(ValueError, match='No samples'):
+        ColorBalance(chunk_size=32).fit(data, mask)
+
+
+def test_color_balance_fit_memory():
+    """Test fitting does not allocate per-sample arrays."""
+    # Given
+    data = np.random.random([300000, 3]) + 0.01
+    balance = ColorBalance(chunk_size=1000)
+    # When
+    tracemalloc.start()
+    balance.fit(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Then
+    assert peak < data.nbytes / 10
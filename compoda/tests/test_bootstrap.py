@@ -0,0 +1,51 @@
+"""Test bootstrap of sample center and total variance."""
+
+import pytest
+import numpy as np
+import compoda.core as coda
+from compoda.bootstrap import (bootstrap_replicates,
+                               bootstrap_confidence_intervals)
+
+
+def test_bootstrap_replicates():
+    """Test weighted replicates against explicit resampling."""
+    # Given
+    data = coda.closure(np.random.random([200, 3]) + 0.01)
+    seeds = np.random.SeedSequence(7).spawn(5)
+    # When
+    centers, tot_vars = bootstrap_replicates(data, n_boot=5, seed=7)
+    # Then
+    for i, child in enumerate(seeds):
+        idx = np.random.default_rng(child).integers(0, 200, 200)
+        assert centers[i] == pytest.approx(coda.sample_center(data[idx])[0])
+        assert tot_vars[i] == pytest.approx(
+            coda.sample_total_variance(data[idx]))
+
+
+def test_bootstrap_reproducible():
+    """Test results agree up to rounding for any batch size or workers."""
+    # Given
+    data = np.random.random([100, 4]) + 0.01
+    # When
+    output_1 = bootstrap_replicates(data, 50, seed=1, batch_size=7,
+                                    n_workers=3)
+    output_2 = bootstrap_replicates(data, 50, seed=1, batch_size=50,
+                                    n_workers=1)
+    # Then
+    # equal up to rounding, BLAS reduction order depends on the batch size
+    assert np.allclose(output_1[0], output_2[0], rtol=1e-12, atol=0)
+    assert np.allclose(output_1[1], output_2[1], rtol=1e-12, atol=0)
+
+
+def test_bootstrap_confidence_intervals():
+    """Test intervals contain the sample statistics."""
+    # Given
+    data = coda.closure(np.random.random([500, 3]) + 0.01)
+    # When
+    center_ci, tot_var_ci = bootstrap_confidence_intervals(data, 200, seed=0)
+    # Then
+    center = coda.sample_center(data)[0]
+    assert np.all((center_ci[0] < center) & (center < center_ci[1]))
+    assert tot_var_ci[0] < coda.sample_total_variance(data) < tot_var_ci[1]
+    with pytest.raises(ValueError):
+        bootstrap_confidence_intervals(data, confidence=95)
@@ -0,0 +1,74 @@
+"""Test hue, saturation and intensity decompositions."""
+
+import pytest
+import numpy as np
+import compoda.core as coda
+from compoda.color import HSI_MATRIX, rgb_to_hsi, barycentric_decomposition
+
+
+def test_rgb_to_hsi():
+    """Test vectorized HSI against the per-sample matrix product."""
+    # Given
+    rgb = np.random.random([500, 3])
+    # When
+    intensity, hue, sat = rgb_to_hsi(rgb, chunk_size=64)
+    # Then
+    for v in [0, 100, 499]:
+        i, v1, v2 = np.dot(HSI_MATRIX, rgb[v, :].T)
+        assert intensity[v] == pytest.approx(i)
+        assert hue[v] == pytest.approx(np.degrees(np.arctan2(v2, v1)))
+        assert sat[v] == pytest.approx(np.sqrt(v1**2 + v2**2))
+    gray = rgb_to_hsi(np.ones([1, 3]))
+    assert gray[2][0] == pytest.approx(0)
+
+
+def test_barycentric_decomposition():
+    """Test fused decomposition against the core metrics."""
+    # Given
+    data = np.random.random([500, 4]) + 0.01
+    data[0] = 2.  # neutral element, zero norm
+    refs = coda.closure(np.random.random([3, 4]) + 0.01)
+    # When
+    intensity, anorm, angdif = barycentric_decomposition(data, refs,
+                                                         chunk_size=64)
+    # Then
+    bary = coda.closure(data)
+    assert np.allclose(intensity, np.mean(data, axis=1))
+    assert np.allclose(anorm, coda.aitchison_norm(bary))
+    for j in range(3):
+        ainp = coda.aitchison_inner_product(bary[1:], refs[j])
+        cos = ainp / (anorm[1:] * coda.aitchison_norm(refs[j]))
+        assert np.allclose(angdif[1:, j], np.arccos(cos))
+    assert np.all(angdif[0] == 0)
+    assert len(barycentric_decomposition(data)) == 2
+
+
+def test_barycentric_decomposition_full_circle():
+    """Test full circle angles agree with the half circle angles."""
+    # Given
+    data = np.random.random([200, 3]) + 0.01
+    ref = np.array([0.05, 0.9, 0.05])
+    # When
+    _, _, half = barycentric_decomposition(data, ref)
+    _, _, full = barycentric_decomposition(data, ref, full_circle=True)
+    # Then
+    assert np.all((full >= 0) & (full < 2 * np.pi))
+    assert np.allclose(np.minimum(full, 2 * np.pi - full), half)
+    with pytest.raises(ValueError):
+        barycentric_decomposition(np.ones([2, 4]), ref, full_circle=True)
+
+
+def test_barycentric_decomposition_full_circle_orientation():
+    """Test full circle angles follow the convention of the examples."""
+    # Given
+    data = np.random.random([200, 3]) + 0.01
+    ref = np.array([0.05, 0.9, 0.05])
+    # When
+    _, anorm, full = barycentric_decomposition(data, ref, full_circle=True)
+    # Then
+    bary = coda.closure(data)
+    ainp = coda.aitchison_inner_product(bary, ref)
+    angle = np.arccos(ainp / (anorm * coda.aitchison_norm(ref)))
+    idx = bary[:, 0] > bary[:, 2]
+    angle[~idx] = 2 * np.pi - angle[~idx]
+    assert np.allclose(full[:, 0], angle)
@@ -0,0 +1,53 @@
+"""Test compositional data container."""
+
+import pytest
+import numpy as np
+import compoda.core as coda
+from compoda.composition import Composition
+
+
+def test_composition_matches_core():
+    """Test cached representations and methods against core functions."""
+    # Given
+    data = np.random.random([100, 4]) + 0.01
+    closed = coda.closure(data)
+    ref = np.array([0.1, 0.2, 0.3, 0.4])
+    # When
+    comp = Composition(data)
+    # Then
+    assert comp.data == pytest.approx(closed)
+    assert comp.clr == pytest.approx(coda.clr_transformation(closed))
+    assert comp.ilr == pytest.approx(coda.ilr_transformation(closed))
+    assert comp.alr() == pytest.approx(coda.alr_transformation(closed))
+    assert comp.aitchison_norm() == pytest.approx(coda.aitchison_norm(closed))
+    assert comp.aitchison_inner_product(ref) == pytest.approx(
+        coda.aitchison_inner_product(closed, ref))
+    assert comp.aitchison_dist(Composition(ref[None, :])) == pytest.approx(
+        coda.aitchison_dist(closed, ref))
+    assert comp.sample_center() == pytest.approx(coda.sample_center(closed))
+    assert comp.sample_total_variance() == pytest.approx(
+        coda.sample_total_variance(closed))
+    assert comp.sample_sstd() == pytest.approx(coda.sample_sstd(closed))
+    assert np.allclose(comp.variation_matrix(), coda.variation_matrix(closed))
+    assert comp.perturb(ref).data == pytest.approx(coda.perturb(closed, ref))
+    assert comp.power(2.).data == pytest.approx(coda.power(closed, 2.))
+
+
+def test_composition_cache():
+    """Test representations are cached, read-only and invalidated."""
+    # Given
+    comp = Composition(np.random.random([10, 3]) + 0.01)
+    clr = comp.clr
+    # Then
+    assert comp.clr is clr
+    with pytest.raises(ValueError):
+        clr[0, 0] = 1.
+    with pytest.raises(ValueError):
+        comp.data[0, 0] = 1.
+    # When
+    comp[0] = [1., 1., 2.]
+    # Then
+    assert comp.clr is not clr
+    assert comp.data[0] == pytest.approx([0.25, 0.25, 0.5])
+    assert comp.clr[0] == pytest.approx(
+        coda.clr_transformation(comp.data[0:1])[0])
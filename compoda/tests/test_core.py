@@ -1,5 +1,6 @@
 """Test core functions."""
 
+import tracemalloc
 import pytest
 import numpy as np
 import compoda.core as coda
@@ -141,3 +142,220 @@ def test_sample_sstd():
     output = coda.sample_sstd(data)
     # Then
     assert output == pytest.approx(0.40018871128431455)
+
+
+def test_ilr_matches_rowwise():
+    """Test vectorized ilr against the row-by-row Helmert projection."""
+    # Given
+    data = coda.closure(np.random.random([50, 4]))
+    helmertian = coda.helmert_basis(4)
+    expected = np.zeros((50, 3))
+    for i in range(data.shape[0]):
+        expected[i, :] = np.dot(np.log(data[i, :]), helmertian.T)
+    # When
+    output = coda.ilr_transformation(data)
+    # Then
+    assert output == pytest.approx(expected)
+    assert coda.helmert_basis(4) is helmertian
+
+
+def pairwise_inner_product(x, y):
+    """Reference Aitchison inner product using all pairwise log-ratios."""
+    dims = x.shape
+    temp = np.zeros(dims[0])
+    for i in range(dims[1]):
+        for j in range(dims[1]):
+            temp += np.log(x[:, i]/x[:, j]) * np.log(y[:, i]/y[:, j])
+    return (1.0 / (2.0 * dims[1])) * temp
+
+
+def test_aitchison_metrics_match_pairwise():
+    """Test clr based metrics against the pairwise log-ratio definitions."""
+    # Given
+    x = coda.closure(np.random.random([20, 6]) + 0.01)
+    y = coda.closure(np.random.random([20, 6]) + 0.01)
+    expected_ip = pairwise_inner_product(x, y)
+    expected_norm = np.sqrt(pairwise_inner_product(x, x))
+    expected_dist = np.sqrt(pairwise_inner_product(x, x)
+                            + pairwise_inner_product(y, y)
+                            - 2 * expected_ip)
+    # When
+    output_ip = coda.aitchison_inner_product(x, y)
+    output_norm = coda.aitchison_norm(x)
+    output_dist = coda.aitchison_dist(x, y)
+    # Then
+    assert output_ip == pytest.approx(expected_ip)
+    assert output_norm == pytest.approx(expected_norm)
+    assert output_dist == pytest.approx(expected_dist)
+
+
+def test_closure_out():
+    """Test closure writes into a given array without copies."""
+    # Given
+    data = np.random.random([100000, 10])
+    expected = coda.closure(data, k=100.)
+    buf = np.copy(data)
+    # When
+    tracemalloc.start()
+    output = coda.closure(buf, k=100., out=buf)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Then
+    assert output is buf
+    assert np.allclose(output, expected)
+    assert peak < data.nbytes / 2  # only the row sums are allocated
+
+
+def test_inplace_chain_allocations():
+    """Test closure, perturb, power and ilr chain with one working buffer."""
+    # Given
+    data = np.random.random([100000, 10]) + 0.01
+    center = coda.closure(np.arange(1., 11.)[None, :])
+    temp = coda.power(coda.perturb(coda.closure(data), center**-1), 0.5)
+    expected = coda.ilr_transformation(temp)
+    buf = np.copy(data)
+    out = np.zeros((data.shape[0], 9))
+    # When
+    tracemalloc.start()
+    coda.closure(buf, out=buf)
+    coda.perturb(buf, center**-1, out=buf)
+    coda.power(buf, 0.5, out=buf)
+    _, peak_operators = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    tracemalloc.start()
+    coda.ilr_transformation(buf, out=out)
+    _, peak_ilr = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Then
+    assert np.allclose(out, expected)
+    assert peak_operators < data.nbytes / 2  # no full-size temporaries
+    assert peak_ilr < 1.5 * data.nbytes  # at most one working buffer
+
+
+def test_float32_precision():
+    """Test float32 inputs keep their type within accuracy bounds."""
+    # Given
+    data_64 = coda.closure(np.random.random([1000, 4]) + 0.01)
+    data_32 = data_64.astype(np.float32)
+    functions = [coda.closure, coda.alr_transformation,
+                 coda.clr_transformation, coda.ilr_transformation,
+                 coda.aitchison_norm, coda.sample_center,
+                 coda.sample_total_variance, coda.sample_sstd]
+    for func in functions:
+        # When
+        output_32 = func(data_32)
+        output_64 = func(data_64)
+        # Then
+        assert output_32.dtype == np.float32
+        assert np.allclose(output_32, output_64, rtol=1e-4, atol=1e-5)
+    # When
+    output_32 = coda.inverse_ilr_transformation(
+        coda.ilr_transformation(data_32))
+    # Then
+    assert output_32.dtype == np.float32
+    assert np.allclose(output_32, data_64, rtol=1e-4, atol=1e-6)
+
+
+@pytest.mark.parametrize('backend', ['numpy', 'numba'])
+def test_closure_dtype(backend):
+    """Test closure of integer data to a requested floating point type."""
+    if backend == 'numba':
+        pytest.importorskip('numba')
+    # Given
+    data = np.array([[1, 1, 2], [3, 3, 4]], dtype=np.int16)
+    # When
+    output = coda.closure(data, dtype=np.float32, backend=backend)
+    output_k = coda.closure(data, k=100, dtype=np.float32, backend=backend)
+    # Then
+    assert output.dtype == np.float32
+    assert output_k.dtype == np.float32
+    assert output[0] == pytest.approx(np.array([0.25, 0.25, 0.5]))
+    assert output_k[0] == pytest.approx(np.array([25., 25., 50.]))
+
+
+def test_sample_center_underflow():
+    """Test sample center of many small compositions does not underflow."""
+    # Given
+    data = np.tile(np.array([[1e-3, 1e-3, 1 - 2e-3]]), (100000, 1))
+    # When
+    output = coda.sample_center(data)
+    # Then
+    assert output[0] == pytest.approx(data[0])
+
+
+def test_broadcast_reference():
+    """Test operators and metrics accept a single reference composition."""
+    # Given
+    data = coda.closure(np.random.random([20, 3]) + 0.01)
+    ref = np.array([0.2, 0.3, 0.5])
+    tiled = np.ones(data.shape) * ref
+    for func in [coda.perturb, coda.aitchison_inner_product,
+                 coda.aitchison_dist]:
+        # When
+        output_1d = func(data, ref)
+        output_2d = func(data, ref[None, :])
+        output_flipped = func(ref[None, :], data)
+        # Then
+        assert output_1d == pytest.approx(func(data, tiled))
+        assert output_2d == pytest.approx(func(data, tiled))
+        assert output_flipped == pytest.approx(func(tiled, data))
+    assert coda.aitchison_norm(ref) == pytest.approx(
+        coda.aitchison_norm(ref[None, :])[0])
+
+
+def test_broadcast_memory():
+    """Test broadcasting a reference saves memory on a million rows."""
+    # Given
+    data = coda.closure(np.random.random([1000000, 3]) + 0.01)
+    ref = np.array([[0.2, 0.3, 0.5]])
+    # When
+    tracemalloc.start()
+    output_tiled = coda.aitchison_inner_product(data,
+                                                np.ones(data.shape) * ref)
+    _, peak_tiled = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    tracemalloc.start()
+    output = coda.aitchison_inner_product(data, ref)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Then
+    assert np.allclose(output, output_tiled)
+    # tiled array and its clr coordinates are not materialized
+    assert peak_tiled - peak > 1.9 * data.nbytes
+
+
+def test_inverse_large_coordinates():
+    """Test inverse transformations do not overflow in float32."""
+    # Given
+    comp = np.array([[1e-30, 1e-20, 1.]], dtype=np.float64)
+    expected = coda.closure(comp)
+    # When
+    clr = coda.clr_transformation(comp).astype(np.float32) * 10
+    alr = coda.alr_transformation(comp).astype(np.float32) * 10
+    ilr = coda.ilr_transformation(comp).astype(np.float32) * 10
+    out_clr = coda.inverse_clr_transformation(clr)
+    out_alr = coda.inverse_alr_transformation(-alr)
+    out_ilr = coda.inverse_ilr_transformation(ilr)
+    # Then
+    for output in [out_clr, out_alr, out_ilr]:
+        assert output.dtype == np.float32
+        assert np.all(np.isfinite(output))
+        assert np.sum(output) == pytest.approx(1)
+    assert out_clr[0] == pytest.approx(coda.power(expected, 10)[0])
+    assert out_alr[0] == pytest.approx(coda.power(expected, -10)[0])
+    assert out_ilr[0] == pytest.approx(out_clr[0])
+
+
+def test_variation_matrix():
+    """Test variation matrix against variances of pairwise logratios."""
+    # Given
+    data = coda.closure(np.random.random([200, 4]) + 0.01)
+    # When
+    output = coda.variation_matrix(data)
+    # Then
+    for i in range(4):
+        for j in range(4):
+            expected = np.var(np.log(data[:, i] / data[:, j]))
+            assert output[i, j] == pytest.approx(expected, abs=1e-12)
+    assert np.sum(output) / (2 * 4) == pytest.approx(
+        coda.sample_total_variance(data))
@@ -0,0 +1,37 @@
+"""Test Aitchison distance matrices."""
+
+import pytest
+import numpy as np
+from scipy.spatial.distance import cdist, pdist
+import compoda.core as coda
+from compoda.distance import aitchison_cdist, aitchison_pdist
+
+
+def test_aitchison_cdist():
+    """Test cross-distances against row-aligned Aitchison distances."""
+    # Given
+    x = coda.closure(np.random.random([37, 4]) + 0.01)
+    y = coda.closure(np.random.random([11, 4]) + 0.01)
+    expected = cdist(coda.clr_transformation(x), coda.clr_transformation(y))
+    # When
+    output = aitchison_cdist(x, y, block_size=8, n_workers=3)
+    # Then
+    assert output.shape == (37, 11)
+    assert output == pytest.approx(expected)
+    assert output[5, 3] == pytest.approx(
+        coda.aitchison_dist(x[5:6], y[3:4])[0])
+
+
+def test_aitchison_pdist():
+    """Test condensed and square pairwise distances."""
+    # Given
+    x = coda.closure(np.random.random([50, 3]) + 0.01)
+    expected = pdist(coda.clr_transformation(x))
+    # When
+    output = aitchison_pdist(x, block_size=7, n_workers=4)
+    output_square = aitchison_pdist(x, condensed=False, block_size=7)
+    # Then
+    assert output == pytest.approx(expected, abs=1e-7)
+    assert output_square[np.triu_indices(50, 1)] == pytest.approx(
+        expected, abs=1e-7)
+    assert np.all(np.diag(output_square) == 0)
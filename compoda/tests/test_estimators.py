@@ -0,0 +1,65 @@
+"""Test scikit-learn compatible transformers."""
+
+import pytest
+import numpy as np
+import compoda.core as coda
+
+pytest.importorskip('sklearn')
+from sklearn.pipeline import make_pipeline  # noqa: E402
+from compoda.estimators import CLR, ILR, CompositionalScaler  # noqa: E402
+
+
+def test_clr_ilr():
+    """Test logratio transformers against core functions."""
+    # Given
+    data = coda.closure(np.random.random([50, 4]) + 0.01)
+    # When
+    output_clr = CLR().fit_transform(data)
+    output_ilr = ILR().fit_transform(data * 7.)  # closure is not needed
+    # Then
+    assert output_clr == pytest.approx(coda.clr_transformation(data))
+    assert output_ilr == pytest.approx(coda.ilr_transformation(data))
+    assert ILR().inverse_transform(output_ilr) == pytest.approx(data)
+
+
+def test_compositional_scaler():
+    """Test centering and standardization against the core recipe."""
+    # Given
+    data = coda.closure(np.random.random([200, 3]) + 0.01)
+    center = coda.sample_center(data)
+    totvar = coda.sample_total_variance(data, center)
+    expected = coda.power(coda.perturb(data, center**-1), totvar**-0.5)
+    # When
+    scaler = CompositionalScaler().fit(data)
+    output = scaler.transform(data)
+    # Then
+    assert output == pytest.approx(expected)
+    assert coda.sample_total_variance(output) == pytest.approx(1.)
+    assert scaler.inverse_transform(output) == pytest.approx(data)
+
+
+def test_compositional_scaler_partial_fit():
+    """Test chunk by chunk fitting and use in a pipeline."""
+    # Given
+    data = coda.closure(np.random.random([300, 3]) + 0.01)
+    expected = CompositionalScaler().fit(data)
+    # When
+    scaler = CompositionalScaler()
+    for i in range(3):
+        scaler.partial_fit(data[i*100:(i+1)*100])
+    pipe = make_pipeline(CompositionalScaler(), ILR())
+    output = pipe.fit_transform(data)
+    # Then
+    assert scaler.n_samples_seen_ == 300
+    assert scaler.center_ == pytest.approx(expected.center_)
+    assert scaler.totvar_ == pytest.approx(expected.totvar_)
+    assert output.shape == (300, 2)
+
+
+def test_compositional_scaler_partial_fit_width():
+    """Test chunks with a different number of parts are rejected."""
+    # Given
+    scaler = CompositionalScaler().partial_fit(np.random.random([10, 3]))
+    # Then
+    with pytest.raises(ValueError, match='parts'):
+        scaler.partial_fit(np.random.random([10, 4]))
@@ -0,0 +1,52 @@
+"""Test label-wise statistics."""
+
+import pytest
+import numpy as np
+import compoda.core as coda
+from compoda.grouped import (grouped_statistics, grouped_sample_center,
+                             grouped_sample_total_variance,
+                             grouped_sample_sstd)
+
+
+def test_grouped_statistics():
+    """Test grouped statistics against masking each label."""
+    # Given
+    data = coda.closure(np.random.random([1000, 4]) + 0.01)
+    labels = np.random.choice([0, 3, 7, 42], size=1000)
+    # When
+    label_values, center, tot_var = grouped_statistics(data, labels,
+                                                       chunk_size=128)
+    _, sstd = grouped_sample_sstd(data, labels)
+    # Then
+    assert np.all(label_values == [0, 3, 7, 42])
+    for i, label in enumerate(label_values):
+        subset = data[labels == label]
+        assert center[i] == pytest.approx(coda.sample_center(subset)[0])
+        assert tot_var[i] == pytest.approx(coda.sample_total_variance(subset))
+        assert sstd[i] == pytest.approx(coda.sample_sstd(subset))
+
+
+def test_grouped_wrappers():
+    """Test wrappers return labels with their statistic."""
+    # Given
+    data = coda.closure(np.random.random([100, 3]) + 0.01)
+    labels = np.repeat([1, 2], 50)
+    # When
+    labels_1, center = grouped_sample_center(data, labels)
+    labels_2, tot_var = grouped_sample_total_variance(data, labels)
+    # Then
+    assert np.all(labels_1 == labels_2)
+    assert center.shape == (2, 3)
+    assert tot_var.shape == (2,)
+
+
+def test_grouped_non_integer_labels():
+    """Test labels that are not small non-negative integers."""
+    # Given
+    data = coda.closure(np.random.random([60, 3]) + 0.01)
+    labels = np.repeat([-5, 1e6, 2.5], 20)
+    # When
+    label_values, center = grouped_sample_center(data, labels)
+    # Then
+    assert np.all(label_values == [-5, 2.5, 1e6])
+    assert center[0] == pytest.approx(coda.sample_center(data[:20])[0])
@@ -0,0 +1,32 @@
+"""Test import time of the package."""
+
+import subprocess
+import sys
+import compoda
+
+IMPORT_BUDGET = 1.0  # seconds, numpy itself takes about 0.1 s
+
+SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import compoda, compoda.core
+print(time.perf_counter() - start)
+print('scipy' in sys.modules)
+print('pkg_resources' in sys.modules)
+"""
+
+
+def test_import_time():
+    """Test importing compoda.core is cheap and does not load extras."""
+    # When
+    output = subprocess.check_output([sys.executable, '-c', SCRIPT])
+    duration, scipy_loaded, pkg_loaded = output.decode().split()
+    # Then
+    assert float(duration) < IMPORT_BUDGET
+    assert scipy_loaded == 'False'
+    assert pkg_loaded == 'False'
+
+
+def test_version():
+    """Test version is still available."""
+    assert isinstance(compoda.__version__, str)
@@ -0,0 +1,57 @@
+"""Test zero replacement functions."""
+
+import pytest
+import numpy as np
+import compoda.core as coda
+from compoda.impute import (multiplicative_replacement,
+                            detection_limit_replacement,
+                            neighborhood_replacement)
+
+
+def test_multiplicative_replacement():
+    """Test zeros are replaced and ratios of other parts are kept."""
+    # Given
+    data = np.array([[1., 2., 3., 4.],
+                     [0., 2., 2., 4.],
+                     [0., 0., 0., 0.]])
+    delta = 0.01
+    # When
+    output = multiplicative_replacement(data, delta=delta)
+    # Then
+    assert output[0] == pytest.approx(coda.closure(data[0:1])[0])
+    assert output[1, 0] == pytest.approx(delta)
+    assert output[1, 1:] == pytest.approx(
+        coda.closure(data[1:2, 1:])[0] * (1 - delta))
+    assert output[2] == pytest.approx(np.ones(4) / 4)
+    assert np.sum(output, axis=1) == pytest.approx(np.ones(3))
+
+
+def test_detection_limit_replacement():
+    """Test nondetects are replaced by a fraction of the detection limit."""
+    # Given
+    data = np.array([[10., 20., 70.],
+                     [0., 50., 50.]])
+    limit = np.array([2., 1., 1.])
+    # When
+    output = detection_limit_replacement(data, limit, fraction=0.5)
+    # Then
+    assert output[0] == pytest.approx([0.1, 0.2, 0.7])
+    assert output[1] == pytest.approx(coda.closure(np.array([[1., 50.,
+                                                              50.]]))[0])
+
+
+def test_neighborhood_replacement():
+    """Test zeros in a voxel grid are filled from their neighbors."""
+    # Given
+    volume = np.ones([5, 5, 5, 3])
+    volume[..., 1] = 2.
+    volume[2, 2, 2, 1] = 0.
+    volume[0, 0, 0, :] = 0.  # outside of the mask
+    mask = np.ones([5, 5, 5], dtype=bool)
+    mask[0, 0, 0] = False
+    # When
+    output = neighborhood_replacement(volume, mask=mask, chunk_size=1)
+    # Then
+    assert output[2, 2, 2, 1] == pytest.approx(2.)
+    assert np.all(output[0, 0, 0] == 0)
+    assert np.sum(output != volume) == 1
@@ -0,0 +1,89 @@
+"""Test multi-threaded execution backend."""
+
+import pytest
+import numpy as np
+import compoda.core as coda
+import compoda.parallel as par
+
+
+def test_map_chunks_matches_serial():
+    """Test threaded transformations against the serial ones."""
+    # Given
+    data = coda.closure(np.random.random([1000, 4]) + 0.01)
+    other = coda.closure(np.random.random([1000, 4]) + 0.01)
+    pairs = [(par.closure, coda.closure, (data,)),
+             (par.alr_transformation, coda.alr_transformation, (data,)),
+             (par.clr_transformation, coda.clr_transformation, (data,)),
+             (par.ilr_transformation, coda.ilr_transformation, (data,)),
+             (par.aitchison_norm, coda.aitchison_norm, (data,)),
+             (par.aitchison_dist, coda.aitchison_dist, (data, other)),
+             (par.aitchison_inner_product, coda.aitchison_inner_product,
+              (data, other))]
+    for threaded, serial, args in pairs:
+        # When
+        output = threaded(*args, n_workers=4, chunk_size=64)
+        # Then
+        assert output == pytest.approx(serial(*args))
+
+
+def test_inverse_transformations():
+    """Test threaded inverse transformations recover the data."""
+    # Given
+    data = coda.closure(np.random.random([500, 3]) + 0.01)
+    # When
+    out_alr = par.inverse_alr_transformation(coda.alr_transformation(data),
+                                             n_workers=3, chunk_size=50)
+    out_clr = par.inverse_clr_transformation(coda.clr_transformation(data),
+                                             n_workers=3, chunk_size=50)
+    out_ilr = par.inverse_ilr_transformation(coda.ilr_transformation(data),
+                                             n_workers=3, chunk_size=50)
+    # Then
+    assert out_alr == pytest.approx(data)
+    assert out_clr == pytest.approx(data)
+    assert out_ilr == pytest.approx(data)
+
+
+def test_deterministic_across_workers():
+    """Test results do not depend on the number of workers."""
+    # Given
+    data = coda.closure(np.random.random([2000, 5]) + 0.01)
+    # When
+    output_1 = par.ilr_transformation(data, n_workers=1, chunk_size=100)
+    output_2 = par.ilr_transformation(data, n_workers=8, chunk_size=100)
+    # Then
+    assert np.array_equal(output_1, output_2)
+
+
+def test_set_n_workers():
+    """Test default worker count configuration."""
+    # When
+    par.set_n_workers(2)
+    output = par.get_n_workers()
+    par.set_n_workers(None)
+    # Then
+    assert output == 2
+    assert par.get_n_workers() >= 1
+    with pytest.raises(ValueError):
+        par.set_n_workers(0)
+
+
+def test_reference_first():
+    """Test a broadcast reference in first position still splits rows."""
+    # Given
+    data = coda.closure(np.random.random([1000, 3]) + 0.01)
+    ref = np.array([[0.2, 0.3, 0.5]])
+    n_rows = []
+
+    def _func(x, y):
+        n_rows.append(y.shape[0])
+        return coda.aitchison_dist(x, y)
+    # When
+    output = par.map_chunks(_func, ref, data, n_workers=2, chunk_size=100)
+    output_dist = par.aitchison_dist(ref, data, chunk_size=100)
+    output_inp = par.aitchison_inner_product(ref, data, chunk_size=100)
+    # Then
+    assert n_rows == [100] * 10
+    assert output == pytest.approx(coda.aitchison_dist(data, ref))
+    assert output_dist == pytest.approx(coda.aitchison_dist(data, ref))
+    assert output_inp == pytest.approx(
+        coda.aitchison_inner_product(data, ref))
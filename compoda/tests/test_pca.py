@@ -0,0 +1,54 @@
+"""Test compositional principal component analysis."""
+
+import pytest
+import numpy as np
+import compoda.core as coda
+from compoda.pca import CompositionalPCA, compositional_pca
+
+
+def _low_rank_compositions(n_samples, n_parts, rank):
+    """Compositions with variance concentrated in a few clr directions."""
+    rng = np.random.RandomState(0)
+    clr = np.dot(rng.standard_normal((n_samples, rank)) * [3, 2, 1][:rank],
+                 rng.standard_normal((rank, n_parts)))
+    clr += 0.01 * rng.standard_normal((n_samples, n_parts))
+    return coda.inverse_clr_transformation(clr)
+
+
+@pytest.mark.parametrize('method', ['covariance', 'randomized'])
+def test_pca_methods_agree(method):
+    """Test chunked solvers against the exact SVD."""
+    # Given
+    data = _low_rank_compositions(2000, 6, 3)
+    exact = CompositionalPCA(3, method='exact').fit(data)
+    # When
+    pca = CompositionalPCA(3, method=method, random_state=0, chunk_size=256)
+    scores = pca.fit_transform(data)
+    # Then
+    assert np.allclose(pca.components_, exact.components_, atol=1e-6)
+    assert np.allclose(pca.explained_variance_, exact.explained_variance_)
+    assert np.allclose(scores, exact.transform(data), atol=1e-6)
+    assert pca.center_ == pytest.approx(coda.sample_center(data))
+
+
+def test_pca_variance_and_inverse():
+    """Test variances sum to the total variance and inversion."""
+    # Given
+    data = coda.closure(np.random.random([300, 4]) + 0.01)
+    # When
+    scores, loadings, variance = compositional_pca(data)
+    pca = CompositionalPCA().fit(data)
+    # Then
+    assert loadings.shape == (4, 3)
+    assert np.allclose(np.dot(loadings.T, loadings), np.eye(3))
+    assert np.sum(variance) == pytest.approx(
+        coda.sample_total_variance(data))
+    assert np.allclose(np.var(scores, axis=0), variance)
+    assert np.sum(pca.explained_variance_ratio_) == pytest.approx(1)
+    assert np.allclose(pca.inverse_transform(scores), data)
+    rows, columns = pca.biplot(scores)
+    assert np.allclose(np.dot(rows, columns.T),
+                       coda.clr_transformation(data) - pca.clr_mean_)
+    assert np.allclose(np.sum(rows**2, axis=0), 1)
+    with pytest.raises(ValueError):
+        CompositionalPCA(4).fit(data)
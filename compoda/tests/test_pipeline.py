@@ -0,0 +1,46 @@
+"""Test fused transformation pipeline."""
+
+import pytest
+import numpy as np
+import compoda.core as coda
+from compoda.pipeline import Pipeline
+
+
+def test_pipeline_matches_chain():
+    """Test fused pipeline against closure, perturb, power and ilr."""
+    # Given
+    data = np.random.random([500, 4]) + 0.01
+    comp = coda.closure(data)
+    center = coda.sample_center(comp)
+    totvar = coda.sample_total_variance(comp, center)
+    temp = coda.power(coda.perturb(comp, center**-1), totvar**-0.5)
+    expected_ilr = coda.ilr_transformation(temp)
+    expected_clr = coda.clr_transformation(temp)
+    # When
+    output_ilr = Pipeline(chunk_size=64).fit_transform(data)
+    output_clr = Pipeline(output='clr', chunk_size=64).fit_transform(data)
+    # Then
+    assert output_ilr == pytest.approx(expected_ilr)
+    assert output_clr == pytest.approx(expected_clr)
+
+
+def test_pipeline_partial_fit_and_inverse():
+    """Test incremental fitting and inverse transformation."""
+    # Given
+    data = coda.closure(np.random.random([300, 3]) + 0.01)
+    pipe_full = Pipeline(chunk_size=1000).fit(data)
+    # When
+    pipe = Pipeline()
+    for i in range(3):
+        pipe.partial_fit(data[i*100:(i+1)*100])
+    coords = pipe.transform(data)
+    # Then
+    assert pipe.center_ == pytest.approx(pipe_full.center_)
+    assert pipe.totvar_ == pytest.approx(pipe_full.totvar_)
+    assert pipe.inverse_transform(coords) == pytest.approx(data)
+
+
+def test_pipeline_output():
+    """Test invalid output coordinates."""
+    with pytest.raises(ValueError):
+        Pipeline(output='alr')
@@ -0,0 +1,75 @@
+"""Test sequential binary partition balances."""
+
+import pytest
+import numpy as np
+import compoda.core as coda
+from compoda.sbp import (validate_sbp, sbp_basis, sbp_transformation,
+                         inverse_sbp_transformation, pivot_sbp)
+
+SBP = np.array([[1, 1, -1, -1, 1],
+                [1, -1, 0, 0, 1],
+                [0, 0, 1, -1, 0],
+                [-1, 0, 0, 0, 1]])
+
+
+def test_sbp_basis():
+    """Test SBP basis is orthonormal and matches the balance formula."""
+    # Given
+    data = coda.closure(np.random.random([10, 5]) + 0.01)
+    # When
+    basis = sbp_basis(SBP)
+    # Then
+    assert np.allclose(np.dot(basis, basis.T), np.eye(4))
+    assert np.allclose(np.sum(basis, axis=1), 0)
+    log = np.log(data)
+    expected = np.sqrt(3 * 2 / 5.) * (np.mean(log[:, [0, 1, 4]], axis=1)
+                                      - np.mean(log[:, [2, 3]], axis=1))
+    assert np.allclose(coda.ilr_transformation(data, basis=basis)[:, 0],
+                       expected)
+
+
+@pytest.mark.parametrize('sbp', [SBP, pivot_sbp(40)])
+def test_sbp_transformation(sbp):
+    """Test sparse and dense balances agree and are invertible."""
+    # Given
+    data = coda.closure(np.random.random([100, sbp.shape[1]]) + 0.01)
+    # When
+    dense = sbp_transformation(data, sbp, sparse=False)
+    sparse = sbp_transformation(data, sbp, sparse=True, chunk_size=16)
+    output = inverse_sbp_transformation(sparse, sbp)
+    # Then
+    assert np.allclose(sparse, dense)
+    assert np.allclose(dense, np.dot(coda.clr_transformation(data),
+                                     sbp_basis(sbp).T))
+    assert np.allclose(output, data)
+
+
+@pytest.mark.parametrize('sbp', [
+    [[1, 1, -1]],                          # wrong shape
+    [[1, 1, 2], [1, -1, 0]],               # wrong values
+    [[1, 1, 1], [1, -1, 0]],               # no split
+    [[1, -1, -1], [1, -1, 0]],             # group {0, 1} is not split
+    [[1, 1, -1], [1, -1, 0], [1, -1, 0]],  # wrong shape
+    [[1, 1, -1, -1], [1, -1, 0, 0], [1, -1, 0, 0]],  # split twice
+])
+def test_validate_sbp(sbp):
+    """Test invalid partitions are rejected."""
+    with pytest.raises(ValueError):
+        validate_sbp(sbp)
+
+
+def test_sbp_transformation_float32():
+    """Test sparse balances of float32 data are as accurate as dense ones."""
+    # Given
+    sbp = pivot_sbp(600)[:, np.random.permutation(600)]
+    data = coda.closure(np.random.random([50, 600]) + 0.01)
+    expected = sbp_transformation(data, sbp, sparse=False)
+    data_32 = data.astype(np.float32)
+    # When
+    dense = sbp_transformation(data_32, sbp, sparse=False)
+    sparse = sbp_transformation(data_32, sbp)
+    # Then
+    assert sparse.dtype == np.float32
+    error_dense = np.max(np.abs(dense - expected))
+    error_sparse = np.max(np.abs(sparse - expected))
+    assert error_sparse <= 2 * error_dense
@@ -0,0 +1,144 @@
+"""Test chunked processing functions."""
+
+import tracemalloc
+import pytest
+import numpy as np
+import compoda.core as coda
+import compoda.streaming as stream
+
+
+def test_iter_chunks():
+    """Test row slices cover all samples."""
+    # Given
+    n_samples, chunk_size = 10, 4
+    # When
+    output = [(c.start, c.stop) for c in stream.iter_chunks(n_samples,
+                                                              chunk_size)]
+    # Then
+    assert output == [(0, 4), (4, 8), (8, 10)]
+
+
+def test_chunked_center_and_variance():
+    """Test chunked statistics against in-memory ones."""
+    # Given
+    data = coda.closure(np.random.random([103, 3]) + 0.01)
+    expected_center = coda.sample_center(data)
+    expected_totvar = coda.sample_total_variance(data, expected_center)
+    # When
+    center = stream.chunked_sample_center(data, chunk_size=10)
+    totvar = stream.chunked_sample_total_variance(data, center, chunk_size=10)
+    # Then
+    assert center == pytest.approx(expected_center)
+    assert totvar == pytest.approx(expected_totvar)
+
+
+def test_fit_statistics():
+    """Test one pass gives center and total variance around any center."""
+    # Given
+    data = np.random.random([103, 4]) + 0.01
+    other = coda.closure(np.random.random([1, 4]) + 0.01)
+    # When
+    stats = stream.fit_statistics(data, chunk_size=10)
+    totvar = stream.chunked_sample_total_variance(data, other, chunk_size=10)
+    # Then
+    assert stats.n_samples == 103
+    assert stats.center == pytest.approx(coda.sample_center(data))
+    assert stats.total_variance == pytest.approx(
+        coda.sample_total_variance(coda.closure(data)))
+    assert totvar == pytest.approx(
+        coda.sample_total_variance(coda.closure(data), other))
+
+
+def test_standardized_ilr_memmap(tmp_path):
+    """Test chunked pipeline over memory-mapped input and output."""
+    # Given
+    n_samples, chunk_size = 5000, 100
+    data = np.lib.format.open_memmap(str(tmp_path / 'data.npy'), mode='w+',
+                                     shape=(n_samples, 3))
+    data[:] = np.random.random([n_samples, 3]) + 0.01
+    comp = coda.closure(np.asarray(data))
+    center = coda.sample_center(comp)
+    temp = coda.perturb(comp, center**-1)
+    totvar = coda.sample_total_variance(temp, center)
+    expected = coda.ilr_transformation(coda.power(temp, totvar**-0.5))
+    out = np.lib.format.open_memmap(str(tmp_path / 'out.npy'), mode='w+',
+                                    shape=(n_samples, 2))
+    # When
+    tracemalloc.start()
+    stream.standardized_ilr(data, out=out, center=center, totvar=totvar,
+                            chunk_size=chunk_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Then
+    assert np.asarray(out) == pytest.approx(expected)
+    assert peak < n_samples * 3 * 8  # less than one full-size array
+
+
+def test_streaming_statistics():
+    """Test single-pass estimator against in-memory statistics."""
+    # Given
+    data = coda.closure(np.random.random([1000, 4]) + 0.01)
+    expected_center = coda.sample_center(data)
+    expected_totvar = coda.sample_total_variance(data)
+    expected_sstd = coda.sample_sstd(data)
+    # When
+    stats = stream.StreamingStatistics()
+    for chunk in stream.iter_chunks(data.shape[0], 128):
+        stats.update(data[chunk])
+    # Then
+    assert stats.n_samples == 1000
+    assert stats.center == pytest.approx(expected_center)
+    assert stats.total_variance == pytest.approx(expected_totvar)
+    assert stats.sstd == pytest.approx(expected_sstd)
+
+
+def test_streaming_statistics_merge():
+    """Test merging estimators fitted on separate subjects."""
+    # Given
+    data_1 = coda.closure(np.random.random([300, 3]) + 0.01)
+    data_2 = coda.closure(np.random.random([500, 3]) + 0.5)
+    expected = coda.sample_total_variance(np.vstack([data_1, data_2]))
+    # When
+    stats_1 = stream.StreamingStatistics().update(data_1)
+    stats_2 = stream.StreamingStatistics().update(data_2)
+    output = stats_1.merge(stats_2).total_variance
+    # Then
+    assert output == pytest.approx(expected)
+
+
+def test_streaming_covariance():
+    """Test chunked and merged variation matrices against the full one."""
+    # Given
+    data = np.random.random([1000, 5]) + 0.01
+    expected = coda.variation_matrix(data)
+    # When
+    output = stream.chunked_variation_matrix(data, chunk_size=77)
+    stats_1 = stream.StreamingCovariance().update(data[:300])
+    stats_2 = stream.StreamingCovariance().update(data[300:])
+    merged = stats_1.merge(stats_2)
+    # Then
+    assert np.allclose(output, expected)
+    assert np.allclose(merged.variation_matrix, expected)
+    assert np.allclose(merged.covariance,
+                       np.cov(coda.clr_transformation(data).T, bias=True))
+    assert merged.total_variance == pytest.approx(
+        coda.sample_total_variance(coda.closure(data)))
+
+
+def test_apply_chunked_float32():
+    """Test float32 blocks are not upcast and the output keeps float32."""
+    # Given
+    data = (np.random.random([1000, 3]) + 0.01).astype(np.float32)
+    dtypes = []
+
+    def _func(x):
+        dtypes.append(x.dtype)
+        return coda.ilr_transformation(x)
+    # When
+    output = stream.apply_chunked(_func, data, chunk_size=128)
+    output_ilr = stream.standardized_ilr(data, chunk_size=128)
+    expected = stream.standardized_ilr(data.astype(np.float64))
+    # Then
+    assert set(dtypes) == {np.dtype(np.float32)}
+    assert output.dtype == np.float32 and output_ilr.dtype == np.float32
+    assert np.allclose(output_ilr, expected, atol=1e-4)
@@ -32,3 +32,63 @@ def test_scale_range():
     # Then
     assert all([np.nanmin(output) >= expected[0],
                 np.nanmax(output) < expected[1]])
+
+
+def test_truncate_range_discard_zeros():
+    """Test truncation keeps zeros and matches nanpercentile."""
+    # Given
+    data = np.random.random([20, 30]) + 0.1
+    data[0, :5] = 0
+    data[1, :3] = np.nan
+    msk = data != 0
+    expected = np.nanpercentile(data[msk], [5, 95])
+    # When
+    output = truncate_range(data, percMin=5, percMax=95)
+    # Then
+    assert np.all(output[0, :5] == 0)
+    assert np.all(np.isnan(output[1, :3]))
+    assert np.array_equal(np.nanpercentile(output[msk], [0, 100]), expected)
+
+
+def test_truncate_range_approximate():
+    """Test histogram based truncation stays within the error bound."""
+    # Given
+    data = np.random.normal(size=100000)
+    tol = 1e-3
+    expected = np.percentile(data, [1, 99])
+    bound = tol * (np.max(data) - np.min(data))
+    # When
+    output = truncate_range(np.copy(data), percMin=1, percMax=99,
+                            discard_zeros=False, approx_tol=tol)
+    # Then
+    assert np.all(np.abs(np.percentile(output, [0, 100]) - expected) <= bound)
+
+
+def test_scale_range_discard_zeros():
+    """Test range scaling ignores zeros."""
+    # Given
+    data = np.array([0., 2., 4., 6., np.nan])
+    # When
+    output = scale_range(data, scale_factor=10)
+    # Then
+    assert np.allclose(output[:4], [0., 0., 5., 10.])
+    assert np.isnan(output[4])
+
+
+def test_integer_images():
+    """Test truncation and scaling of integer images in place."""
+    # Given
+    data = np.random.randint(0, 1000, size=[20, 30]).astype(np.int16)
+    data[0, :5] = 0
+    msk = data != 0
+    p_min, p_max = np.percentile(data[msk], [5, 95])
+    # When
+    truncated = truncate_range(np.copy(data), percMin=5, percMax=95)
+    scaled = scale_range(np.copy(data), scale_factor=100)
+    # Then
+    assert truncated.dtype == np.int16 and scaled.dtype == np.int16
+    assert np.all(truncated[0, :5] == 0)
+    assert np.min(truncated[msk]) == np.rint(p_min)
+    assert np.max(truncated[msk]) == np.rint(p_max)
+    assert np.all(scaled[0, :5] == 0)
+    assert np.min(scaled[msk]) == 0 and np.max(scaled[msk]) == 100
@@ -4,19 +4,77 @@ from __future__ import division
 import numpy as np
 
 
-def truncate_range(data, percMin=0.25, percMax=99.75, discard_zeros=True):
+ZERO_TOL = 1e-08  # absolute tolerance of np.isclose(data, 0)
+
+
+def _histogram_percentiles(values, q, approx_tol):
+    """Approximate percentiles from a fixed-bin cumulative histogram.
+
+    Parameters
+    ----------
+    values : 1d numpy array
+        Finite values.
+    q : list of floats
+        Percentiles in range [0, 100].
+    approx_tol : float
+        Maximum error as a fraction of the value range (bin width).
+
+    Returns
+    -------
+    out : 1d numpy array
+        Approximate percentiles, linearly interpolated within bins.
+
+    """
+    v_min, v_max = np.min(values), np.max(values)
+    n_bins = max(int(np.ceil(1. / approx_tol)), 1)
+    counts, edges = np.histogram(values, bins=n_bins, range=(v_min, v_max))
+    return _percentiles_from_histogram(counts, edges, q)
+
+
+def _percentiles_from_histogram(counts, edges, q):
+    """Percentiles from histogram counts, linearly interpolated within bins.
+
+    Parameters
+    ----------
+    counts : 1d numpy array, shape [n_bins]
+        Number of values in each bin, e.g. accumulated over chunks.
+    edges : 1d numpy array, shape [n_bins+1]
+        Bin edges.
+    q : list of floats
+        Percentiles in range [0, 100].
+
+    Returns
+    -------
+    out : 1d numpy array
+
+    """
+    n_bins = counts.shape[0]
+    cdf = np.cumsum(counts)
+    ranks = np.asarray(q, dtype=float) / 100. * (cdf[-1] - 1)
+    idx = np.minimum(np.searchsorted(cdf, ranks, side='right'), n_bins - 1)
+    below = np.where(idx > 0, cdf[idx - 1], 0)
+    frac = np.clip((ranks - below) / np.maximum(counts[idx], 1), 0, 1)
+    return edges[idx] + frac * (edges[idx + 1] - edges[idx])
+
+
+def truncate_range(data, percMin=0.25, percMax=99.75, discard_zeros=True,
+                   approx_tol=None):
     """Truncate too low and too high values.
 
     Parameters
     ----------
     data : np.ndarray
-        Image to be truncated.
+        Image to be truncated. Modified in place.
     percMin : float
         Percentile minimum.
     percMax : float
         Percentile maximum.
     discard_zeros : bool
         Discard voxels with value 0 from truncation.
+    approx_tol : float, optional
+        When given, percentiles are estimated from a cumulative histogram in
+        a single pass instead of a selection. The error of the estimated
+        percentiles is at most approx_tol times the range of the data.
 
     Returns
     -------
@@ -24,15 +82,23 @@ def truncate_range(data, percMin=0.25, percMax=99.75, discard_zeros=True):
 
     """
     if discard_zeros:
-        msk = ~np.isclose(data, 0)
-        pMin, pMax = np.nanpercentile(data[msk], [percMin, percMax])
+        zeros = np.abs(data) <= ZERO_TOL
+        values = data[~(zeros | np.isnan(data))]
+    else:
+        values = data[~np.isnan(data)]
+    if approx_tol is None:
+        # selection based, operating on the single copy of valid values
+        pMin, pMax = np.percentile(values, [percMin, percMax],
+                                   overwrite_input=True)
     else:
-        pMin, pMax = np.nanpercentile(data, [percMin, percMax])
-    temp = data[~np.isnan(data)]
-    temp[temp < pMin], temp[temp > pMax] = pMin, pMax  # truncate min and max
-    data[~np.isnan(data)] = temp
+        pMin, pMax = _histogram_percentiles(values, [percMin, percMax],
+                                            approx_tol)
+    if not np.issubdtype(data.dtype, np.floating):
+        # integer images, clipping in place needs bounds of the same type
+        pMin, pMax = np.rint([pMin, pMax]).astype(data.dtype)
+    np.clip(data, pMin, pMax, out=data)  # NaNs stay NaN
     if discard_zeros:
-        data[~msk] = 0  # put back masked out voxels
+        np.copyto(data, 0, where=zeros)  # put back masked out voxels
     return data
 
 
@@ -42,7 +108,7 @@ def scale_range(data, scale_factor=500, delta=0, discard_zeros=True):
     Parameters
     ----------
     data : np.ndarray
-        Image to be scaled.
+        Image to be scaled. Modified in place.
     scale_factor : float
         Lower scaleFactors provides faster interface due to loweing the
         resolution of 2D histogram ( 500 seems fast enough).
@@ -58,13 +124,23 @@ def scale_range(data, scale_factor=500, delta=0, discard_zeros=True):
         Scaled image.
 
     """
+    if not np.issubdtype(data.dtype, np.floating):
+        # integer images are scaled in a float copy and rounded back
+        work = scale_range(data.astype(np.float64), scale_factor, delta,
+                           discard_zeros)
+        np.copyto(data, np.rint(work), casting='unsafe')
+        return data
     if discard_zeros:
-        msk = ~np.isclose(data, 0)
+        zeros = np.abs(data) <= ZERO_TOL
+        valid = ~zeros
     else:
-        msk = np.ones(data.shape, dtype=bool)
+        valid = True
+    # fmin and fmax ignore NaNs, no copies of the selected values are made
+    d_min = np.fmin.reduce(data, axis=None, where=valid, initial=np.inf)
+    d_max = np.fmax.reduce(data, axis=None, where=valid, initial=-np.inf)
     scale_factor = scale_factor - delta
-    data[msk] = data[msk] - np.nanmin(data[msk])
-    data[msk] = scale_factor / np.nanmax(data[msk]) * data[msk]
+    data -= d_min
+    data *= scale_factor / (d_max - d_min)
     if discard_zeros:
-        data[~msk] = 0  # put back masked out voxels
+        np.copyto(data, 0, where=zeros)  # put back masked out voxels
     return data
@@ -2,8 +2,7 @@
 
 import os
 import numpy as np
-import compoda.core as coda
-from compoda.utils import truncate_range
+from compoda.balance import ColorBalance
 from nibabel import load, save, Nifti1Image
 
 # Load data
@@ -30,41 +29,12 @@ orig = orig.reshape(dims[0]*dims[1]*dims[2], dims[3])
 
 # Impute
 orig[orig <= 0] = 1
-comp = np.copy(orig)
 
-# Lightness
-light = (np.max(comp, axis=1) + np.min(comp, axis=1)) / 2.
-
-# Closure
-comp = coda.closure(comp)
-
-# Do not consider masked values
-p_mask = mask.reshape(dims[0]*dims[1]*dims[2])
-p_comp = comp[p_mask > 0]
-
-# Centering
-center = coda.sample_center(p_comp)
-temp = np.ones(p_comp.shape) * center
-p_comp = coda.perturb(p_comp, temp**-1.)
-# Standardize
-totvar = coda.sample_total_variance(p_comp, center)
-p_comp = coda.power(p_comp, np.power(totvar, -1./2.))
-
-# Use Aitchison norm and powerinf for truncation of extreme compositions
-anorm_thr = 3
-anorm = coda.aitchison_norm(p_comp)
-idx_trunc = anorm > anorm_thr
-truncation_power = anorm[idx_trunc] / anorm_thr
-correction = np.ones(anorm.shape)
-correction[idx_trunc] = truncation_power
-comp_bal = coda.power(p_comp, correction[:, None])
-
-# go to hexcone lattice for exports
-comp[p_mask > 0] = comp_bal
-
-# lightness balance
-light = truncate_range(light, percMin=1, percMax=99)
-hexc = comp * light[:, None]
+# Fit center, total variance and lightness range once, then balance in chunks
+p_mask = mask.reshape(dims[0]*dims[1]*dims[2]) > 0
+balance = ColorBalance(anorm_thr=3, perc_min=1, perc_max=99)
+hexc = balance.fit_transform(orig, p_mask)
+balance.save(os.path.join(dirname, 'simplex_cbal.npz'))  # reuse later
 
 hexc = hexc.reshape(dims[0], dims[1], dims[2], dims[3])
 for i in range(hexc.shape[3]):
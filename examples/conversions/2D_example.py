@@ -1,11 +1,11 @@
 """Color transformations on 2D image."""
 
 from skimage import data, color
-from skimage.filters import gaussian
 from skimage.io import imsave
 import matplotlib.pyplot as plt
 import numpy as np
 import compoda.core as coda
+from compoda.impute import neighborhood_replacement
 from compoda.utils import truncate_range
 from matplotlib import rcParams
 rcParams['font.family'] = "serif"
@@ -16,10 +16,8 @@ orig = data.rocket()
 img = np.copy(orig) * 1.0
 dims = img.shape
 
-# impute zeros
-idx1 = (img[..., 0] <= 0) + (img[..., 1] <= 0) + (img[..., 2] <= 0)
-gauss = gaussian(img, sigma=0.5, multichannel=True)
-img[idx1, :] = gauss[idx1, :]
+# impute zeros (only pixels with zeros are visited)
+img = neighborhood_replacement(img)
 
 # rgb to hsv for control
 hsv = color.rgb2hsv(img)
@@ -32,10 +30,7 @@ bary = coda.closure(temp, 100)
 anorm = coda.aitchison_norm(bary)
 
 # prepare reference vector for angular difference
-ref = np.ones(bary.shape)
-ref[:, 0] = ref[:, 0] * 0.8
-ref[:, 1] = ref[:, 1] * 0.1
-ref[:, 2] = ref[:, 2] * 0.1
+ref = np.array([[0.8, 0.1, 0.1]])  # broadcast to all samples
 # compute aitchion angular difference
 ainp = coda.aitchison_inner_product(bary, ref)
 ref_norm = coda.aitchison_norm(ref)
@@ -43,12 +38,12 @@ ang_dif = np.zeros(anorm.shape)
 # deal with zero norms
 idx = anorm != 0
 # (choose one) wrapped angle range
-ang_dif[idx] = np.arccos(ainp[idx]/(anorm[idx] * ref_norm[idx]))
+ang_dif[idx] = np.arccos(ainp[idx]/(anorm[idx] * ref_norm))
 ang_dif[np.isnan(ang_dif)] = 0  # fix nans assigned to bright
 # (choose one) full angle range
 idx_s = bary[:, 1] > bary[:, 2]
-# ang_dif[idx_s] = np.arccos(ainp[idx_s]/(anorm[idx_s] * ref_norm[idx_s]))
-# ang_dif[~idx_s] = 2*np.pi - np.arccos(ainp[~idx_s]/(anorm[~idx_s] * ref_norm[~idx_s]))
+# ang_dif[idx_s] = np.arccos(ainp[idx_s]/(anorm[idx_s] * ref_norm))
+# ang_dif[~idx_s] = 2*np.pi - np.arccos(ainp[~idx_s]/(anorm[~idx_s] * ref_norm))
 # truncate anorm
 anorm = truncate_range(anorm, percMin=0, percMax=99)
 
@@ -4,6 +4,7 @@ import os
 import numpy as np
 from nibabel import load, save, Nifti1Image
 import compoda.core as coda
+from compoda.color import barycentric_decomposition
 
 # Load data
 nii1 = load('/path/to/file1.nii.gz')
@@ -28,31 +29,19 @@ rgb = rgb.reshape(dims[0]*dims[1]*dims[2], dims[3])
 rgb[rgb == 0] = 1.
 
 # barycentric decomposition
-intensity = np.sum(rgb, axis=-1) / rgb.shape[-1]
-bary = coda.closure(rgb)
-anorm = coda.aitchison_norm(bary)
+ref = np.array([[0.05, 0.9, 0.05]])
+intensity, anorm, ang_dif = barycentric_decomposition(rgb, ref,
+                                                      full_circle=True)
+ang_dif = ang_dif[:, 0]
 
-# prepare reference vector for anglular difference
-# TODO: export for all three main references
-ref = np.ones(bary.shape)
-ref[:, 0] = ref[:, 0] * 0.05
-ref[:, 1] = ref[:, 1] * 0.9
-ref[:, 2] = ref[:, 2] * 0.05
-
-# compute aitchion angular difference
-ainp = coda.aitchison_inner_product(bary, ref)
+# aitchison inner product with the reference
+ainp = coda.aitchison_inner_product(coda.closure(rgb), ref)
 
 # Export inner product
 img = ainp.reshape(dims[:-1])
 out = Nifti1Image(img, affine=nii1.affine)
 save(out, os.path.join(dirname, 'a_innerp.nii.gz'))
 
-ref_norm = coda.aitchison_norm(ref)
-idx = bary[:, 0] > bary[:, 2]  # NOTE: Selected in relation to the reference
-ang_dif = np.zeros(anorm.shape)
-ang_dif[idx] = np.arccos(ainp[idx]/(anorm[idx] * ref_norm[idx]))
-ang_dif[~idx] = 2*np.pi - np.arccos(ainp[~idx]/(anorm[~idx] * ref_norm[~idx]))
-
 # Export intensity
 img = intensity.reshape(dims[:-1])
 out = Nifti1Image(img, affine=nii1.affine)
@@ -3,6 +3,7 @@
 import os
 import numpy as np
 from nibabel import load, save, Nifti1Image
+from compoda.color import rgb_to_hsi
 
 # Load data
 nii1 = load('/home/faruk/Data/Faruk/rgb_hsi/T1.nii.gz')
@@ -23,28 +24,20 @@ rgb[..., 1] = vol2
 rgb[..., 2] = vol3
 rgb = rgb.reshape(dims[0]*dims[1]*dims[2], dims[3])
 
-hsi_matrix = np.array([
-    [1./np.sqrt(3), 1./np.sqrt(3), 1./np.sqrt(3)],
-    [1./np.sqrt(6), 1./np.sqrt(6), -2./np.sqrt(6)],
-    [1./np.sqrt(2), -1./np.sqrt(3), 0.]])
-
-temp = np.zeros(rgb.shape)
-for v in range(rgb.shape[0]):
-    temp[v, :] = np.dot(hsi_matrix, rgb[v, :].T)
-temp = temp.reshape(dims)
-intensity, v1, v2 = temp[..., 0], temp[..., 1], temp[..., 2]
+intensity, hue, sat = rgb_to_hsi(rgb)
+intensity = intensity.reshape(dims[:-1])
+hue = hue.reshape(dims[:-1])
+sat = sat.reshape(dims[:-1])
 
 # Export intensity
 out = Nifti1Image(intensity, affine=nii1.affine)
 save(out, os.path.join(dirname, 'intensity.nii.gz'))
 
 # Export hue
-hue = np.arctan(v2/v1) * (180/np.pi)
 out = Nifti1Image(hue, affine=nii1.affine)
 save(out, os.path.join(dirname, 'hue.nii.gz'))
 
 # Export saturation
-sat = np.sqrt(v1**2. + v2**2.)
 out = Nifti1Image(sat, affine=nii1.affine)
 save(out, os.path.join(dirname, 'saturation.nii.gz'))
 
@@ -55,8 +55,7 @@ ilr_orig = tet.ilr_transformation(np.copy(p_comp))
 # Centering
 center = tet.sample_center(p_comp)
 print("Sample center: " + str(center))
-c_temp = np.ones(p_comp.shape) * center
-p_comp = tet.perturb(p_comp, c_temp**-1)
+p_comp = tet.perturb(p_comp, center**-1)
 # Standardize
 totvar = tet.sample_total_variance(p_comp, center)
 p_comp = tet.power(p_comp, np.power(totvar, -1./2.))
@@ -113,8 +112,7 @@ for a in range(3):
     c_axis = tet.closure(c_axis)
 
     # (optional) center the primary guides the same way
-    c_temp = np.ones(c_axis.shape) * center
-    c_axis = tet.perturb(c_axis, c_temp**-1.)
+    c_axis = tet.perturb(c_axis, center**-1.)
     c_axis = tet.power(c_axis, np.power(totvar, -1./2.))
 
     c_axis = tet.ilr_transformation(c_axis)
@@ -126,8 +124,7 @@ plt.show()
 print('Exporting ilr coordinates...')
 # ilr transformation for nifti output (also considering unplotted data)
 # Centering
-c_temp = np.ones(comp.shape) * center
-comp = tet.perturb(comp, c_temp**-1.)
+comp = tet.perturb(comp, center**-1.)
 # Standardize
 comp = tet.power(comp, np.power(totvar, -1./2.))
 ilr = tet.ilr_transformation(comp)
@@ -51,8 +51,7 @@ ilr_orig = coda.ilr_transformation(np.copy(comp))
 # Centering
 center = coda.sample_center(comp)
 print("Sample center: " + str(center))
-c_temp = np.ones(comp.shape) * center
-p_comp = coda.perturb(comp, c_temp**-1)
+p_comp = coda.perturb(comp, center**-1)
 # Standardize
 totvar = coda.sample_total_variance(comp, center)
 comp = coda.power(comp, np.power(totvar, -1./2.))
@@ -109,8 +108,7 @@ for a in range(3):
     c_axis = coda.closure(c_axis)
 
     # (optional) center the primary guides the same way
-    c_temp = np.ones(c_axis.shape) * center
-    c_axis = coda.perturb(c_axis, c_temp**-1.)
+    c_axis = coda.perturb(c_axis, center**-1.)
     c_axis = coda.power(c_axis, np.power(totvar, -1./2.))
 
     c_axis = coda.ilr_transformation(c_axis)
@@ -43,9 +43,7 @@ comp[comp == 0] = 1.
 comp = coda.closure(comp)
 
 # Aitchison inner product
-ref = np.ones(comp.shape)
-ref[:, 1] = ref[:, 1] * 10
-ref = coda.closure(ref)
+ref = coda.closure(np.array([[1., 10., 1.]]))  # broadcast to all samples
 ip = coda.aitchison_inner_product(comp, ref)
 
 cos_theta = ip / (coda.aitchison_norm(comp) * coda.aitchison_norm(ref))
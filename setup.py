@@ -23,5 +23,6 @@ setup(name='compoda',
       author_email='faruk.gulban@maastrichtuniversity.nl',
       license='BSD-3-clause',
       packages=['compoda'],
-      install_requires=['numpy', 'scipy'],
+      install_requires=['numpy>=1.17', 'scipy',
+                        'importlib_metadata; python_version < "3.8"'],
       zip_safe=False)